@@ -6,17 +6,34 @@ import random
 import datetime
 import time
 import re
+import base64
+from collections import namedtuple
+import functools
+import hashlib
+import csv
+import io
+from types import SimpleNamespace
 
 # Ensure project root is on sys.path for imports like 'backend.calculator', 'backend.finance'
 PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from backend.calculator import material, BaseConverter, GeneralConverter
+from backend.calculator import material, BaseConverter, GeneralConverter, batch_values, convert_batch
+from backend.assets import ONLINE_BROTLI_QUALITY, AssetIndex, IndexShell, sender_from_env, serve_asset
+from backend.caching import LocalLRU, Memoizer
+from backend.invalidation import bus_from_env
+from backend.images import ALLOWED_WIDTHS, DEFAULT_QUALITY, FORMATS, QUALITY_RANGE, SOURCE_TYPES, cache_from_env as image_cache_from_env, negotiate_format, snap_width
+from backend.indicators import compute_indicators, normalize_spec
+from backend.portfolio import portfolio_history, risk_metrics
+from backend.market_calendar import market_ttl, current_session_date, is_market_open
+from backend.migrations import run_migrations
+from backend.request_tracker import tracker_from_env
+from backend.transaction_import import ImportValidationError, read_transactions_csv, chronological_order, check_holdings
 
 # Import finance functions with error handling
 try:
-    from backend.finance import get_stock_data, get_stock_info, get_current_price
+    from backend.finance import get_stock_data, get_stock_info, get_current_price, get_current_prices, downsample_lttb
     FINANCE_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: Finance module import failed: {e}")
@@ -28,8 +45,14 @@ except ImportError as e:
         return {}
     def get_current_price(*args, **kwargs):
         return 0.0
-
-from flask import Flask, request, redirect, abort, session, jsonify, send_from_directory
+    def get_current_prices(tickers, *args, **kwargs):
+        return {t: 0.0 for t in tickers}
+    def downsample_lttb(labels, prices, max_points):
+        return labels, prices
+
+import click
+import numpy as np
+from flask import Flask, Request, Response, request, redirect, abort, session, jsonify, send_file, send_from_directory, stream_with_context
 from flask_login import LoginManager, login_required, UserMixin, login_user, logout_user, current_user
 from flask_sqlalchemy import SQLAlchemy
 from flask_caching import Cache
@@ -42,8 +65,8 @@ from flask_mail import Mail, Message
 from sqlalchemy.sql import func
 from flask_cors import CORS
 from jinja2 import ChoiceLoader, FileSystemLoader
-from sqlalchemy import text  # Added for raw SQL text usage
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import text, insert, or_  # Added for raw SQL text usage
+from werkzeug.security import generate_password_hash, check_password_hash, safe_join
 
 # Paths
 BACKEND_DIR = os.path.dirname(__file__)
@@ -52,6 +75,23 @@ STATIC_DIR = os.path.join(PROJECT_ROOT, 'static')
 INSTANCE_DIR = os.path.join(PROJECT_ROOT, 'instance')
 os.makedirs(INSTANCE_DIR, exist_ok=True)
 
+# Bulk transaction imports are allowed past the global request size cap
+IMPORT_PATH = '/api/transactions/import'
+IMPORT_MAX_BYTES = int(os.getenv('IMPORT_MAX_BYTES', str(32 * 1024 * 1024)))
+IMPORT_MAX_ROWS = int(os.getenv('IMPORT_MAX_ROWS', '250000'))
+IMPORT_BATCH_ROWS = 5000
+
+# Delta-sync change log entries older than this are pruned; clients whose
+# sync cursor predates the cutoff are sent back to a full reload
+TRANSACTION_CHANGE_RETENTION = datetime.timedelta(days=int(os.getenv('TRANSACTION_CHANGE_RETENTION_DAYS', '30')))
+
+class AppRequest(Request):
+    @property
+    def max_content_length(self):
+        if self.path == IMPORT_PATH:
+            return IMPORT_MAX_BYTES
+        return super().max_content_length
+
 # Initialize Flask app with explicit template/static/instance folders
 app = Flask(
     __name__,
@@ -61,6 +101,7 @@ app = Flask(
     instance_path=INSTANCE_DIR,
     instance_relative_config=True,
 )
+app.request_class = AppRequest
 # Allow loading templates from backend and root templates folders
 ROOT_TEMPLATES_DIR = os.path.join(PROJECT_ROOT, 'templates')
 app.jinja_loader = ChoiceLoader([
@@ -124,6 +165,20 @@ app.config.update(cache_config)
 # Initialize extensions
 db = SQLAlchemy(app)
 cache = Cache(app)
+# Broadcasts invalidations to every worker (Redis pub/sub or a shared-memory file)
+invalidation_bus = bus_from_env()
+# Coalesces concurrent misses of the finance memos into one upstream fetch
+memo = Memoizer(
+    cache,
+    wait_timeout=float(os.getenv('CACHE_WAIT_TIMEOUT', '15')),
+    lock_timeout=float(os.getenv('CACHE_LOCK_TIMEOUT', '30')),
+    bus=invalidation_bus,
+    # With a shared Redis cache, hot entries are also kept in-process (L1)
+    l1=LocalLRU(
+        max_bytes=int(os.getenv('MEMO_L1_MAX_BYTES', str(32 * 1024 * 1024))),
+        max_ttl=float(os.getenv('MEMO_L1_TTL', '60')),
+    ) if os.getenv('REDIS_URL') else None,
+)
 
 # Initialize rate limiter for DDoS protection
 def get_limiter_storage():
@@ -148,45 +203,60 @@ limiter = Limiter(
 # Additional DDoS protection measures
 app.config['MAX_CONTENT_LENGTH'] = 1 * 1024 * 1024  # 1MB max request size
 
-# Track suspicious activity
-suspicious_ips = set()
-request_counts = {}
+# Track request rates and suspicious activity (bounded; fleet-wide with Redis)
+request_tracker = tracker_from_env()
+
+# Request screening policies, resolved by path prefix (first match wins).
+# Static assets skip rate tracking but still get the bad-bot user agent check;
+# API routes get the strictest checks.
+RoutePolicy = namedtuple('RoutePolicy', ['track', 'check_user_agent', 'require_user_agent', 'max_body'])
+STATIC_POLICY = RoutePolicy(track=False, check_user_agent=True, require_user_agent=False, max_body=None)
+PAGE_POLICY = RoutePolicy(track=True, check_user_agent=True, require_user_agent=False, max_body=None)
+API_POLICY = RoutePolicy(track=True, check_user_agent=True, require_user_agent=True, max_body=100 * 1024)
+ROUTE_POLICIES = (
+    ('/static/', STATIC_POLICY),
+    (IMPORT_PATH, API_POLICY._replace(max_body=None)),  # bounded by IMPORT_MAX_BYTES instead
+    ('/api/', API_POLICY),
+)
+
+# Known bad bot patterns (adjust as needed), matched case-insensitively in one pass
+BAD_USER_AGENT_PATTERNS = ['masscan', 'nmap', 'sqlmap', 'nikto', 'dirb', 'dirbuster', 'gobuster']
+BAD_USER_AGENT_RE = re.compile('|'.join(re.escape(p) for p in BAD_USER_AGENT_PATTERNS), re.IGNORECASE)
+
+def route_policy(path):
+    for prefix, policy in ROUTE_POLICIES:
+        if path.startswith(prefix):
+            return policy
+    return PAGE_POLICY
 
 # Add IP-based request limiting middleware
 @app.before_request
 def before_request_security():
     """Additional security checks before processing requests"""
+    policy = route_policy(request.path)
     client_ip = get_remote_address()
     
-    # Track request frequency per IP for anomaly detection
-    current_time = time.time()
-    request_counts[client_ip] = request_counts.get(client_ip, [])
-    # Clean old entries (keep last 60 seconds)
-    request_counts[client_ip] = [t for t in request_counts[client_ip] if current_time - t < 60]
-    request_counts[client_ip].append(current_time)
+    if policy.track:
+        # Track request frequency per IP for anomaly detection (sliding 60s window)
+        recent = request_tracker.hit(client_ip)
+        # Flag IPs with excessive requests (more than 100 per minute)
+        if recent > 100 and request_tracker.flag(client_ip):
+            # Log suspicious activity once per flag period
+            print(f"WARNING: Suspicious activity from IP {client_ip} - {recent} requests in 60s")
     
-    # Flag IPs with excessive requests (more than 100 per minute)
-    if len(request_counts[client_ip]) > 100:
-        suspicious_ips.add(client_ip)
-        # Log suspicious activity
-        print(f"WARNING: Suspicious activity from IP {client_ip} - {len(request_counts[client_ip])} requests in 60s")
+    user_agent = request.headers.get('User-Agent', '')
     
     # Block requests with suspicious headers that may indicate DDoS
-    user_agent = request.headers.get('User-Agent', '').lower()
-    
-    # Block known bad bot patterns (adjust as needed)
-    bad_patterns = ['masscan', 'nmap', 'sqlmap', 'nikto', 'dirb', 'dirbuster', 'gobuster']
-    if any(pattern in user_agent for pattern in bad_patterns):
-        print(f"WARNING: Blocked suspicious user agent from {client_ip}: {user_agent}")
+    if policy.check_user_agent and user_agent and BAD_USER_AGENT_RE.search(user_agent):
+        print(f"WARNING: Blocked suspicious user agent from {client_ip}: {user_agent.lower()}")
         abort(403)  # Forbidden
     
     # Limit request body size for JSON endpoints
-    if request.path.startswith('/api/') and request.content_length:
-        if request.content_length > 100 * 1024:  # 100KB limit for API requests
-            abort(413)  # Payload too large
+    if policy.max_body is not None and request.content_length and request.content_length > policy.max_body:
+        abort(413)  # Payload too large
     
     # Block requests with no User-Agent (common in simple DDoS attacks)
-    if not request.headers.get('User-Agent') and request.path.startswith('/api/'):
+    if policy.require_user_agent and not user_agent:
         print(f"WARNING: Blocked request with no User-Agent from {client_ip}")
         abort(400)  # Bad Request
 
@@ -236,10 +306,9 @@ def add_security_headers(response):
         response.headers['Content-Security-Policy'] = csp
     
     # Cache headers for static assets
+    # (React build files get theirs per file from the asset index)
     if request.endpoint and 'static' in request.endpoint:
         response.headers['Cache-Control'] = 'public, max-age=31536000'  # 1 year
-    elif request.endpoint in ['serve_react_css', 'serve_react_js', 'serve_react_media']:
-        response.headers['Cache-Control'] = 'public, max-age=31536000'  # 1 year
     
     return response
 
@@ -274,13 +343,49 @@ def user_on_mobile():
     ua = (request.headers.get('User-Agent') or '').lower()
     return any(token in ua for token in ('iphone', 'android', 'ipad', 'mobile'))
 
-# Cached wrapper functions for expensive stock API calls
-@cache.memoize(timeout=300)  # Cache for 5 minutes
+# Cached wrapper functions for expensive stock API calls.
+# Market data stays fresh for the given TTL during the trading session and
+# until the next open otherwise; expired entries are served for another
+# STALE_TTL seconds while they refresh in the background.
+STALE_TTL = int(os.getenv('CACHE_STALE_TIMEOUT', str(24 * 3600)))
+# The finance helpers return 0.0 / empty series on errors; such results are
+# only kept briefly so an outage is not cached until the next open.
+FAILURE_TTL = int(os.getenv('CACHE_FAILURE_TIMEOUT', '60'))
+
+def _price_failed(price):
+    return not price
+
+def _series_failed(series):
+    return not series or not series[0]
+
+def _info_failed(info):
+    return str(info[-1]).startswith('Error fetching')
+
+@memo.memoize(timeout=market_ttl(300), stale_timeout=STALE_TTL, failed=_price_failed, failure_timeout=FAILURE_TTL)  # 5 minutes while trading
 def cached_get_current_price(ticker):
     """Cached version of get_current_price to reduce API calls"""
     return get_current_price(ticker)
 
-@cache.memoize(timeout=600)  # Cache for 10 minutes (stock data changes less frequently)
+def cached_get_current_prices(tickers):
+    """Current prices for several tickers sharing cached_get_current_price's memo.
+    Memo hits are read in one get_many; all misses are resolved with a single
+    batched download and written back per ticker in one set_many. Stale hits
+    are served as-is and refreshed with one batched download in the background.
+    """
+    def refresh(arg_tuples):
+        fetched = get_current_prices([a[0] for a in arg_tuples])
+        return [fetched[a[0]] for a in arg_tuples]
+
+    tickers = list(dict.fromkeys(tickers))
+    prices = dict(zip(tickers, cached_get_current_price.get_many([(t,) for t in tickers], refresh)))
+    missing = [t for t, price in prices.items() if price is None]
+    if missing:
+        fetched = get_current_prices(missing)
+        cached_get_current_price.set_many([((t,), fetched[t]) for t in missing])
+        prices.update(fetched)
+    return prices
+
+@memo.memoize(timeout=market_ttl(600), stale_timeout=STALE_TTL, failed=_series_failed, failure_timeout=FAILURE_TTL)  # 10 minutes while trading
 def cached_get_stock_data(ticker, *args):
     """Cached version of get_stock_data to reduce API calls.
     Supports:
@@ -307,7 +412,22 @@ def cached_get_stock_data(ticker, *args):
         # On any error in wrapper, call with defaults to avoid breaking callers
         return get_stock_data(ticker)
 
-@cache.memoize(timeout=3600)  # Cache for 1 hour (company info rarely changes)
+@memo.memoize(timeout=market_ttl(600), stale_timeout=STALE_TTL, failed=_series_failed, failure_timeout=FAILURE_TTL)
+def cached_get_downsampled_stock_data(ticker, max_points, *args):
+    """LTTB-downsampled cached_get_stock_data(ticker, *args), cached per (ticker, range, max_points)."""
+    labels, prices = cached_get_stock_data(ticker, *args)
+    return downsample_lttb(labels, prices, max_points)
+
+@memo.memoize(timeout=24 * 3600)
+def cached_compute_indicators(ticker, last_bar, spec, *args):
+    """Indicators over cached_get_stock_data(ticker, *args).
+    last_bar (date, close) is part of the key, so a new or updated bar
+    starts a new entry instead of serving indicators of an older series.
+    """
+    labels, prices = cached_get_stock_data(ticker, *args)
+    return compute_indicators(prices, spec)
+
+@memo.memoize(timeout=3600, stale_timeout=STALE_TTL, failed=_info_failed, failure_timeout=FAILURE_TTL)  # Cache for 1 hour (company info rarely changes)
 def cached_get_stock_info(ticker):
     """Cached version of get_stock_info to reduce API calls"""
     return get_stock_info(ticker)
@@ -343,6 +463,8 @@ class User(db.Model, UserMixin):
     
     # Relationship with proper back_populates
     transactions = db.relationship('Dashinfo', back_populates='user_ref', cascade='all, delete-orphan')
+    positions = db.relationship('Position', cascade='all, delete-orphan')
+    transaction_changes = db.relationship('TransactionChange', cascade='all, delete-orphan')
 
 class Dashinfo(db.Model):
     __tablename__ = 'dashinfo'
@@ -360,6 +482,36 @@ class Dashinfo(db.Model):
     # Relationship with proper back_populates
     user_ref = db.relationship('User', back_populates='transactions', foreign_keys=[user])
 
+# Hot paths filter by user (and ticker/type) and list history newest first.
+# Existing databases gain these through backend.migrations.
+db.Index('ix_dashinfo_user_ticker_type', Dashinfo.user, Dashinfo.ticker, Dashinfo.type)
+db.Index('ix_dashinfo_user_date', Dashinfo.user, Dashinfo.date.desc(), Dashinfo.id.desc())
+
+class Position(db.Model):
+    """Current holding per (user, ticker), maintained alongside every Dashinfo write."""
+    __tablename__ = 'position'
+    __table_args__ = {'extend_existing': True}
+
+    user = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    ticker = db.Column(db.String(10), primary_key=True)
+    shares = db.Column(db.Integer, nullable=False, default=0)
+    cost_basis = db.Column(db.Float, nullable=False, default=0.0)  # average cost of the shares held
+    realized_pnl = db.Column(db.Float, nullable=False, default=0.0)
+
+class TransactionChange(db.Model):
+    """Append-only log of Dashinfo inserts and deletes, read by the delta sync API."""
+    __tablename__ = 'transaction_change'
+    __table_args__ = {'extend_existing': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    user = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    transaction_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(6), nullable=False)  # 'add' or 'delete'
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)  # NULL on rows older than the column
+
+db.Index('ix_transaction_change_user_id', TransactionChange.user, TransactionChange.id)
+db.Index('ix_transaction_change_user_created', TransactionChange.user, TransactionChange.created_at)
+
 class Maillist(db.Model):
     __tablename__ = 'maillist'
     __table_args__ = {'extend_existing': True}
@@ -374,6 +526,263 @@ class Maillist(db.Model):
 def load_user(user_id):
     return db.session.get(User, int(user_id))  # Updated for SQLAlchemy 2.x
 
+# Positions fold transactions in chronological order: by Dashinfo.date, then
+# Dashinfo.id for equal dates. Average cost depends on this order whenever
+# sells fall between buys at different prices, so live writes, imports and
+# rebuild_positions() all use it; a backdated write re-folds its ticker.
+POSITION_ORDER = (Dashinfo.date, Dashinfo.id)
+
+def _fold_position(pos, amount, price):
+    """Apply one signed share amount at price to a position (average-cost method)."""
+    if amount > 0:  # BUY
+        pos.shares += amount
+        pos.cost_basis += abs(price) * amount
+    elif amount < 0:  # SELL
+        sold = min(-amount, pos.shares)
+        avg_cost = pos.cost_basis / pos.shares if pos.shares > 0 else 0.0
+        pos.realized_pnl += (abs(price) - avg_cost) * sold
+        pos.cost_basis -= avg_cost * sold
+        pos.shares += amount
+        if pos.shares <= 0:
+            pos.cost_basis = 0.0
+
+def _locked_position(user_id, ticker):
+    """The user's Position row for ticker, locked for update (created if missing)."""
+    pos = db.session.get(Position, (user_id, ticker), with_for_update=True)
+    if pos is None:
+        pos = Position(user=user_id, ticker=ticker, shares=0, cost_basis=0.0, realized_pnl=0.0)
+        db.session.add(pos)
+    return pos
+
+def apply_position(user_id, ticker, amount, price):
+    """Update the user's Position row for a new latest transaction (caller commits)."""
+    pos = _locked_position(user_id, ticker)
+    _fold_position(pos, amount, price)
+    return pos
+
+def refold_position(user_id, ticker):
+    """Recompute one Position row from its full history in POSITION_ORDER (caller commits)."""
+    pos = _locked_position(user_id, ticker)
+    acc = SimpleNamespace(shares=0, cost_basis=0.0, realized_pnl=0.0)
+    history = (db.session.query(Dashinfo.amount, Dashinfo.price)
+               .filter(Dashinfo.user == user_id, Dashinfo.ticker == ticker)
+               .order_by(*POSITION_ORDER))
+    for amount, price in history.yield_per(1000):
+        _fold_position(acc, amount or 0, price)
+    pos.shares, pos.cost_basis, pos.realized_pnl = acc.shares, acc.cost_basis, acc.realized_pnl
+    return pos
+
+def latest_transaction_date(user_id, ticker):
+    """Date of the user's most recent transaction in ticker (None without any)."""
+    return (db.session.query(func.max(Dashinfo.date))
+            .filter(Dashinfo.user == user_id, Dashinfo.ticker == ticker).scalar())
+
+def prune_transaction_changes(user_id=None):
+    """Delete change-log entries older than TRANSACTION_CHANGE_RETENTION (caller commits).
+
+    Returns:
+        int: Number of entries deleted.
+    """
+    cutoff = datetime.datetime.utcnow() - TRANSACTION_CHANGE_RETENTION
+    query = TransactionChange.query.filter(or_(TransactionChange.created_at < cutoff,
+                                               TransactionChange.created_at.is_(None)))
+    if user_id is not None:
+        query = query.filter(TransactionChange.user == user_id)
+    return query.delete(synchronize_session=False)
+
+def _lock_change_log(user_id):
+    """Serialize the user's transaction writers until commit and prune expired change-log entries.
+
+    Change ids are drawn from one sequence but become visible in commit
+    order, so on PostgreSQL a concurrent writer could commit a lower id after
+    a sync has read past it. Taking the user row lock before the first id is
+    drawn keeps each user's ids committing in id order.
+    """
+    db.session.query(User.id).filter_by(id=user_id).with_for_update().scalar()
+    prune_transaction_changes(user_id)
+
+def record_transaction(tx):
+    """Stage a new transaction with its position update and change-log entry (caller commits)."""
+    _lock_change_log(tx.user)
+    latest = latest_transaction_date(tx.user, tx.ticker)
+    when = tx.date
+    if when.tzinfo is not None:  # stored naive UTC
+        when = when.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    db.session.add(tx)
+    if latest is not None and when < latest:
+        # Backdated: the new row is not last in POSITION_ORDER
+        refold_position(tx.user, tx.ticker)
+    else:
+        apply_position(tx.user, tx.ticker, tx.amount, tx.price)
+    db.session.flush()  # assigns tx.id
+    db.session.add(TransactionChange(user=tx.user, transaction_id=tx.id, op='add'))
+
+def delete_ticker_transactions(user_id, ticker):
+    """Stage the removal of every transaction of a ticker (caller commits)."""
+    _lock_change_log(user_id)
+    ids = [i for (i,) in db.session.query(Dashinfo.id).filter_by(user=user_id, ticker=ticker)]
+    Dashinfo.query.filter_by(user=user_id, ticker=ticker).delete(synchronize_session=False)
+    Position.query.filter_by(user=user_id, ticker=ticker).delete(synchronize_session=False)
+    if ids:
+        db.session.execute(insert(TransactionChange), [
+            {'user': user_id, 'transaction_id': i, 'op': 'delete'} for i in ids
+        ])
+    return len(ids)
+
+def import_transactions(user_id, source):
+    """Validate a transaction CSV and stage all of its rows (caller commits).
+
+    Sells are checked against running per-ticker totals that start from the
+    user's current positions. Rows are inserted in chronological order with
+    batched multi-row INSERTs.
+
+    Returns:
+        tuple: (number of rows imported, sorted list of tickers).
+
+    Raises:
+        ImportValidationError: If any row is invalid; nothing is staged.
+    """
+    rows = read_transactions_csv(source, max_rows=IMPORT_MAX_ROWS)
+    tickers = sorted(set(rows['ticker'].tolist()))
+    # The user row lock also covers tickers without a Position row yet: every
+    # transaction writer takes it first, so two imports (or an import and a
+    # manual trade) cannot both create the same new position
+    _lock_change_log(user_id)
+    positions = {
+        p.ticker: p for p in Position.query.filter(Position.user == user_id, Position.ticker.in_(tickers))
+        .with_for_update().all()
+    }
+    errors = check_holdings(rows, {t: p.shares for t, p in positions.items()})
+    if errors:
+        raise ImportValidationError(errors)
+    latest = dict(db.session.query(Dashinfo.ticker, func.max(Dashinfo.date))
+                  .filter(Dashinfo.user == user_id, Dashinfo.ticker.in_(tickers))
+                  .group_by(Dashinfo.ticker).all())
+
+    order = chronological_order(rows)
+    ticker, amount = rows['ticker'][order], rows['amount'][order]
+    price, dates = rows['price'][order], rows['date'][order]
+    for start in range(0, len(order), IMPORT_BATCH_ROWS):
+        batch = slice(start, start + IMPORT_BATCH_ROWS)
+        batch_rows = [
+            {
+                'ticker': t,
+                'price': p if a > 0 else -p,  # legacy convention: sells store a negative price
+                'date': d,
+                'type': 'BUY' if a > 0 else 'SELL',
+                'amount': a,
+                'user': user_id,
+                'total': p * abs(a),
+            }
+            for t, a, p, d in zip(ticker[batch].tolist(), amount[batch].tolist(), price[batch].tolist(),
+                                  dates[batch].astype('datetime64[us]').tolist())
+        ]
+        # Core inserts skip ORM bookkeeping; RETURNING yields ids for the change log
+        ids = db.session.execute(Dashinfo.__table__.insert().returning(Dashinfo.__table__.c.id),
+                                 batch_rows).scalars().all()
+        db.session.execute(TransactionChange.__table__.insert(), [
+            {'user': user_id, 'transaction_id': i, 'op': 'add'} for i in ids
+        ])
+
+    # Tickers with imported rows before their latest existing transaction are
+    # re-folded from history so the result matches POSITION_ORDER
+    first_imported = {}
+    for t, d in zip(ticker.tolist(), dates.astype('datetime64[us]').tolist()):
+        first_imported.setdefault(t, d)
+    backdated = {t for t in tickers if t in latest and first_imported[t] < latest[t]}
+    for t in sorted(backdated):
+        refold_position(user_id, t)
+
+    # Fold the rest into plain accumulators; instrumented ORM attributes are slow per row
+    totals = {}
+    for t in tickers:
+        if t in backdated:
+            continue
+        pos = positions.get(t)
+        totals[t] = SimpleNamespace(shares=pos.shares if pos else 0,
+                                    cost_basis=pos.cost_basis if pos else 0.0,
+                                    realized_pnl=pos.realized_pnl if pos else 0.0)
+    for t, a, p in zip(ticker.tolist(), amount.tolist(), price.tolist()):
+        if t in totals:
+            _fold_position(totals[t], a, p)
+    for t, acc in totals.items():
+        if t not in positions:
+            positions[t] = Position(user=user_id, ticker=t)
+            db.session.add(positions[t])
+        positions[t].shares = acc.shares
+        positions[t].cost_basis = acc.cost_basis
+        positions[t].realized_pnl = acc.realized_pnl
+    return len(order), tickers
+
+def held_shares(user_id, ticker):
+    """Shares of ticker currently held by the user."""
+    shares = db.session.query(Position.shares).filter_by(user=user_id, ticker=ticker).scalar()
+    return shares or 0
+
+def rebuild_positions(user_id=None):
+    """Recompute Position rows from the transaction history (in POSITION_ORDER).
+
+    Args:
+        user_id (int): Only rebuild this user's positions (all users when None).
+
+    Returns:
+        int: Number of positions written.
+    """
+    positions = {}
+    query = (db.session.query(Dashinfo.user, Dashinfo.ticker, Dashinfo.amount, Dashinfo.price)
+             .order_by(*POSITION_ORDER))
+    stale = Position.query
+    if user_id is not None:
+        query = query.filter(Dashinfo.user == user_id)
+        stale = stale.filter_by(user=user_id)
+    for user, ticker, amount, price in query.yield_per(1000):
+        pos = positions.get((user, ticker))
+        if pos is None:
+            pos = positions[(user, ticker)] = Position(user=user, ticker=ticker, shares=0,
+                                                        cost_basis=0.0, realized_pnl=0.0)
+        _fold_position(pos, amount or 0, price)
+    try:
+        stale.delete(synchronize_session=False)
+        db.session.add_all(positions.values())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    for uid in {u for u, _ in positions} | ({user_id} if user_id is not None else set()):
+        bump_data_version(uid)
+    return len(positions)
+
+@app.cli.command('import-transactions')
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--username', required=True, help='Account to import into.')
+def import_transactions_command(csv_path, username):
+    """Bulk import a transaction CSV for a user."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"Unknown user {username}")
+    try:
+        count, tickers = import_transactions(user.id, csv_path)
+        db.session.commit()
+        bump_data_version(user.id)
+    except ImportValidationError as e:
+        db.session.rollback()
+        raise click.ClickException('\n'.join([str(e)] + e.errors))
+    print(f"Imported {count} transactions for {len(tickers)} tickers")
+
+@app.cli.command('rebuild-positions')
+@click.option('--user', 'user_id', type=int, default=None, help='Only rebuild this user id.')
+def rebuild_positions_command(user_id):
+    """Backfill the position table from all transactions."""
+    count = rebuild_positions(user_id)
+    print(f"Rebuilt {count} positions")
+
+@app.cli.command('prune-transaction-changes')
+def prune_transaction_changes_command():
+    """Delete expired delta-sync change-log entries of all users."""
+    count = prune_transaction_changes()
+    db.session.commit()
+    print(f"Pruned {count} change-log entries")
+
 
 
 
@@ -471,26 +880,131 @@ def sitemap():
 
 # SPA Route - Serve React Frontend
 FRONTEND_BUILD_DIR = os.path.join(STATIC_DIR, 'frontend')
+# Scanned once per worker: sizes, hashes and gzip/brotli variants of the build
+frontend_assets = AssetIndex(FRONTEND_BUILD_DIR, memory_budget=int(os.getenv('ASSET_MEMORY_BUDGET', str(64 * 1024 * 1024))))
+# index.html for every SPA route; reloaded in the background when the build changes
+frontend_shell = IndexShell(
+    FRONTEND_BUILD_DIR,
+    check_interval=float(os.getenv('FRONTEND_SHELL_CHECK_SECONDS', '2')),
+    preload_hints=os.getenv('FRONTEND_PRELOAD_HINTS', '').lower() in ('1', 'true', 'yes'),
+    on_change=functools.partial(frontend_assets.scan, brotli_quality=ONLINE_BROTLI_QUALITY),
+)
+# Large media: Range-aware send_file, or X-Accel-Redirect/X-Sendfile offload (MEDIA_OFFLOAD)
+media_sender = sender_from_env(PROJECT_ROOT)
+# Resized/re-encoded project images for /api/images
+image_cache = image_cache_from_env()
+# How long a request waits for a cold derivative before serving the original;
+# the encode finishes in the pool either way and is served from then on
+IMAGE_ENCODE_WAIT = float(os.getenv('IMAGE_ENCODE_WAIT', '0.05'))
+
+
+def serve_build_file(rel):
+    """Serve a file of the React build from the asset index.
+
+    Args:
+        rel (str): Path relative to the build directory.
+
+    Returns:
+        Response: The (possibly compressed) file, a 304, or 404.
+    """
+    asset = frontend_assets.get(rel)
+    if asset is None:
+        # Not in the startup scan (e.g. copied in later); the only path that touches the disk
+        path = safe_join(FRONTEND_BUILD_DIR, rel)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        return media_sender.send(path)
+    return serve_asset(asset, media_sender)
+
+
+def serve_static(filename):
+    """Flask's static route, with media offload and Range support"""
+    path = safe_join(STATIC_DIR, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    return media_sender.send(path)
+
+app.view_functions['static'] = serve_static
 
 # Handle React build static assets (CSS, JS, etc.)
 @app.route('/static/css/<path:filename>')
 @limiter.limit("200 per minute")  # Reasonable limit for CSS files
 def serve_react_css(filename):
     """Serve CSS files from React build"""
-    return send_from_directory(os.path.join(FRONTEND_BUILD_DIR, 'static', 'css'), filename)
+    return serve_build_file(f"static/css/{filename}")
 
 @app.route('/static/js/<path:filename>')
 @limiter.limit("200 per minute")  # Reasonable limit for JS files
 def serve_react_js(filename):
     """Serve JS files from React build"""
-    return send_from_directory(os.path.join(FRONTEND_BUILD_DIR, 'static', 'js'), filename)
+    return serve_build_file(f"static/js/{filename}")
 
 @app.route('/static/media/<path:filename>')
 @limiter.limit("100 per minute")  # Lower limit for media files (usually larger)
 def serve_react_media(filename):
     """Serve media files from React build"""
     # Media files are directly in static/frontend/static/ (no media subdirectory)
-    return send_from_directory(os.path.join(FRONTEND_BUILD_DIR, 'static'), filename)
+    return serve_build_file(f"static/{filename}")
+
+def _image_source(filename):
+    """Path and content fingerprint of an original image, or (None, None)."""
+    asset = frontend_assets.get(f"static/{filename}")
+    if asset is not None:
+        return asset.path, asset.etag
+    # Fall back to Flask's static folder (media is copied there as well)
+    path = safe_join(STATIC_DIR, filename)
+    try:
+        st = os.stat(path) if path else None
+    except OSError:
+        st = None
+    if st is None:
+        return None, None
+    return path, f"{st.st_mtime_ns}-{st.st_size}"
+
+@app.route('/api/images/<path:filename>')
+@limiter.limit("120 per minute")
+def api_image(filename):
+    """Serve a resized, re-encoded copy of a project image.
+
+    Query params: w (width in px, snapped to ALLOWED_WIDTHS), format (webp,
+    avif, jpeg; negotiated from Accept when omitted) and q (quality).
+    """
+    try:
+        if not filename.lower().endswith(SOURCE_TYPES):
+            return jsonify({'success': False, 'message': 'Unsupported image type'}), 400
+        source, fingerprint = _image_source(filename)
+        if source is None:
+            return jsonify({'success': False, 'message': 'Image not found'}), 404
+        try:
+            width = snap_width(int(request.args.get('w', ALLOWED_WIDTHS[-1])))
+            quality = int(request.args.get('q', DEFAULT_QUALITY))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'w and q must be integers'}), 400
+        quality = min(max(quality, QUALITY_RANGE[0]), QUALITY_RANGE[1])
+        fmt = request.args.get('format', '').lower() or None
+        if fmt == 'jpg':
+            fmt = 'jpeg'
+        if fmt is not None and fmt not in FORMATS:
+            return jsonify({'success': False, 'message': f"format must be one of: {', '.join(sorted(FORMATS))}"}), 400
+
+        negotiated = fmt is None
+        if negotiated:
+            fmt = negotiate_format(request.accept_mimetypes)
+        derivative = image_cache.get(source, fingerprint, width, fmt, quality, timeout=IMAGE_ENCODE_WAIT)
+        if derivative is None:
+            # Still encoding (or failed): the original now, the derivative next time
+            response = send_file(source, conditional=True)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        response = send_file(derivative, mimetype=FORMATS[fmt][2], conditional=True,
+                             etag=os.path.basename(derivative).split('.')[0])
+        response.headers['Cache-Control'] = 'public, max-age=86400'
+        if negotiated:
+            response.vary.add('Accept')
+        return response
+    except Exception as e:
+        print(f"Image error for {filename}: {e}")
+        return jsonify({'success': False, 'message': 'Could not process image'}), 500
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -507,14 +1021,14 @@ def spa(path):
     
     # Serve static files from React build if they exist (non-static paths)
     if path and '.' in path:
-        candidate = os.path.join(FRONTEND_BUILD_DIR, path)
-        if os.path.isfile(candidate):
-            return send_from_directory(FRONTEND_BUILD_DIR, path)
+        asset = frontend_assets.get(path)
+        if asset is not None:
+            return serve_asset(asset, media_sender)
     
     # For all other routes, serve the React SPA
-    index_path = os.path.join(FRONTEND_BUILD_DIR, 'index.html')
-    if os.path.isfile(index_path):
-        return send_from_directory(FRONTEND_BUILD_DIR, 'index.html')
+    shell = frontend_shell.get()
+    if shell is not None:
+        return serve_asset(shell)
     
     # If build is missing, show error
     return jsonify({
@@ -704,6 +1218,83 @@ def api_calculator_convert():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
+# Batch unit conversion; the API body limit (100KB) caps payloads well before this
+CONVERT_BATCH_MAX_VALUES = int(os.getenv('CONVERT_BATCH_MAX_VALUES', '20000'))
+
+@app.route('/api/calculator/convert/batch', methods=['POST'])
+@limiter.limit("60 per minute")
+def api_calculator_convert_batch():
+    """Convert a list of values.
+
+    Body: {"values": [...], "input_unit": "m", "output_unit": "ft"}, where
+    either unit may instead be a list with one unit per value
+    ("input_units"/"output_units"), or "pairs": [["m", "ft"], ...].
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            numbers = batch_values(data.get('values'), CONVERT_BATCH_MAX_VALUES)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        pairs = data.get('pairs')
+        if pairs is not None:
+            if not isinstance(pairs, list) or len(pairs) != len(numbers) or \
+                    not all(isinstance(p, list) and len(p) == 2 for p in pairs):
+                return jsonify({'success': False, 'message': 'pairs must be one [input_unit, output_unit] per value'}), 400
+            input_units = [p[0] for p in pairs]
+            output_units = [p[1] for p in pairs]
+        else:
+            input_units = data.get('input_units', data.get('input_unit'))
+            output_units = data.get('output_units', data.get('output_unit'))
+        units = []
+        for given in (input_units, output_units):
+            names = [given] if isinstance(given, str) else given
+            if not isinstance(names, list) or not names or \
+                    not all(isinstance(u, str) and u.strip() for u in names):
+                return jsonify({'success': False, 'message': 'input and output units are required'}), 400
+            if any(len(u) > 64 for u in names):
+                return jsonify({'success': False, 'message': 'Unit strings are too long'}), 400
+            units.append(given.strip() if isinstance(given, str) else [u.strip() for u in names])
+
+        results = convert_batch(numbers, units[0], units[1])
+        # JSON has no Infinity/NaN; overflowing conversions are an input error
+        if not np.isfinite(results).all():
+            return jsonify({'success': False, 'message': 'Conversion result is out of range'}), 400
+        return jsonify({'success': True, 'results': results.tolist(), 'count': len(numbers)})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+def _series_range_args(data):
+    """cached_get_stock_data range arguments from a request body:
+    (start, end), (period,) or () for the full history."""
+    # period can be a string or list (frontend currently sends ['1y'])
+    period = data.get('period')
+    if isinstance(period, list) and period:
+        period = period[0]
+    elif not isinstance(period, str):
+        period = None
+
+    start = data.get('start_date') or data.get('start')
+    end = data.get('end_date') or data.get('end')
+    if start and end:
+        return (start, end)
+    elif period:
+        return (period,)
+    return ()
+
+# Downsampling targets; requests snap up to one of these (largest past the end)
+# so the cache holds at most a few variants per series. Keep in sync with
+# MAX_POINTS_BUCKETS in frontend/src/pages/Finance.js.
+MAX_POINTS_BUCKETS = (500, 1000, 2000)
+
+def snap_max_points(max_points):
+    """Smallest bucket >= max_points, capped at the largest bucket."""
+    for bucket in MAX_POINTS_BUCKETS:
+        if max_points <= bucket:
+            return bucket
+    return MAX_POINTS_BUCKETS[-1]
+
 # New: Finance stock data API endpoint for React frontend
 @app.route('/api/finance/stock-data', methods=['POST'])
 @limiter.limit("30 per minute")  # Limit expensive external API calls
@@ -714,23 +1305,23 @@ def api_finance_stock_data():
         if not ticker:
             return jsonify({'success': False, 'message': 'ticker_name is required'}), 400
 
-        # period can be a string or list (frontend currently sends ['1y'])
-        period = data.get('period')
-        if isinstance(period, list) and period:
-            period = period[0]
-        elif not isinstance(period, str):
-            period = None
-
-        start = data.get('start_date') or data.get('start')
-        end = data.get('end_date') or data.get('end')
+        # Optional server-side downsampling for long series
+        max_points = data.get('max_points')
+        if max_points is not None:
+            try:
+                max_points = int(max_points)
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'message': 'max_points must be an integer'}), 400
+            if max_points < 3:
+                return jsonify({'success': False, 'message': 'max_points must be at least 3'}), 400
+            max_points = snap_max_points(max_points)
 
         # Fetch time series data
-        if start and end:
-            labels, prices = cached_get_stock_data(ticker, start, end)
-        elif period:
-            labels, prices = cached_get_stock_data(ticker, period)
+        args = _series_range_args(data)
+        if max_points:
+            labels, prices = cached_get_downsampled_stock_data(ticker, max_points, *args)
         else:
-            labels, prices = cached_get_stock_data(ticker)
+            labels, prices = cached_get_stock_data(ticker, *args)
 
         if not labels or not prices:
             return jsonify({'success': False, 'message': f'No stock data found for {ticker}'}), 404
@@ -783,6 +1374,38 @@ def api_finance_stock_data():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+# Technical indicators computed server-side over the cached series
+@app.route('/api/finance/indicators', methods=['POST'])
+@limiter.limit("30 per minute")
+def api_finance_indicators():
+    try:
+        data = request.get_json(silent=True) or {}
+        ticker = (data.get('ticker_name') or data.get('ticker') or '').strip().upper()
+        if not ticker:
+            return jsonify({'success': False, 'message': 'ticker_name is required'}), 400
+        try:
+            spec = normalize_spec(data.get('indicators'))
+        except (TypeError, ValueError, AttributeError) as e:
+            return jsonify({'success': False, 'message': f'Invalid indicators: {e}'}), 400
+
+        args = _series_range_args(data)
+        labels, prices = cached_get_stock_data(ticker, *args)
+        if not labels or not prices:
+            return jsonify({'success': False, 'message': f'No stock data found for {ticker}'}), 404
+
+        indicators = cached_compute_indicators(ticker, (labels[-1], prices[-1]), spec, *args)
+        return jsonify({
+            'success': True,
+            'data': {
+                'ticker': ticker,
+                'labels': labels,
+                'values': prices,
+                'indicators': indicators,
+            }
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 # New: Material properties API endpoint
 @app.route('/api/calculator/material-properties', methods=['POST'])
 def api_material_properties():
@@ -960,28 +1583,233 @@ def api_newsletter_subscribe():
         print(f"Newsletter subscription error: {e}")
         return jsonify({'success': False, 'message': 'Failed to subscribe. Please try again later.'}), 500
 
+# ==================== Per-user response cache ====================
+# Serialized GET responses are cached under the user's data version, which every
+# write bumps on the invalidation bus after committing, so repeat requests skip the DB and JSON encoding
+# and revalidate to 304 through a strong ETag.
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '300'))
+PRICE_EPOCH_SECONDS = 300  # matches the session TTL of cached_get_current_price
+
+def _data_version_key(user_id):
+    return f"user-data-version:{user_id}"
+
+def data_version(user_id):
+    """Token that changes whenever the user's transactions change, in every worker."""
+    # epoch-counter: a reset counter table starts a new epoch, so tokens never repeat
+    return '{}-{}'.format(*invalidation_bus.generation(_data_version_key(user_id)))
+
+def bump_data_version(user_id):
+    """Invalidate the user's cached responses; call after the write is committed."""
+    invalidation_bus.invalidate(_data_version_key(user_id))
+
+def price_epoch():
+    """Changes every PRICE_EPOCH_SECONDS while trading and once per session otherwise."""
+    session_date = current_session_date().isoformat()
+    if is_market_open():
+        return f"{session_date}:{int(time.time() // PRICE_EPOCH_SECONDS)}"
+    return session_date
+
+def user_response_cache(name, with_prices=False):
+    """Cache a login-protected JSON GET view per (user, data version[, price epoch], query)."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = current_user.id
+            parts = [name, str(user_id), data_version(user_id), request.query_string.decode()]
+            if with_prices:
+                parts.append(price_epoch())
+            key = 'response:' + hashlib.sha1('|'.join(parts).encode()).hexdigest()
+            entry = cache.get(key)
+            if entry is None:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                body = response.get_data()
+                entry = (hashlib.sha256(body).hexdigest()[:32], body)
+                cache.set(key, entry, timeout=RESPONSE_CACHE_TTL)
+            etag, body = entry
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = Response(body, mimetype='application/json')
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
 # ==================== Transactions API (for React Dashboard) ====================
+MAX_TRANSACTION_PAGE = 500
+MAX_SYNC_CHANGES = 1000
+
+def _serialize_transaction(t):
+    return {
+        'id': t.id,
+        'ticker': t.ticker,
+        'price': t.price,
+        'amount': t.amount,
+        'type': t.type,
+        'date': t.date.isoformat(),
+        'total': t.total
+    }
+
+def _encode_cursor(*parts):
+    raw = '|'.join(str(p) for p in parts).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _decode_cursor(cursor, kind):
+    """Parts of an opaque cursor; ValueError if malformed or of another kind."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    except Exception:
+        raise ValueError('Invalid cursor')
+    parts = raw.split('|')
+    if parts[0] != kind:
+        raise ValueError('Invalid cursor')
+    return parts[1:]
+
+class SyncCursorExpired(Exception):
+    """The change log no longer covers a sync cursor; the client must reload everything."""
+
+# Longest a change-log write may take between drawing its id and committing
+SYNC_CURSOR_SLACK = datetime.timedelta(hours=1)
+
+def _sync_cursor(user_id):
+    """Cursor at the user's latest change-log entry, stamped with its issue time."""
+    issued = int(time.time())
+    last = db.session.query(func.max(TransactionChange.id)).filter_by(user=user_id).scalar()
+    return _encode_cursor('s', last or 0, issued)
+
+def _transaction_changes(user_id, since, limit):
+    """Net transaction changes after a sync cursor, oldest first, at most limit log entries.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+        SyncCursorExpired: If entries after the cursor may have been pruned
+            (cursors from before issue times were recorded count as expired).
+    """
+    parts = _decode_cursor(since, 's')
+    if len(parts) != 2:
+        raise SyncCursorExpired()
+    try:
+        after, issued = int(parts[0]), int(parts[1])
+    except ValueError:
+        raise ValueError('Invalid cursor')
+    now = int(time.time())
+    # Writes in flight at issue time may carry a created_at up to the slack earlier
+    if issued < now - (TRANSACTION_CHANGE_RETENTION - SYNC_CURSOR_SLACK).total_seconds():
+        raise SyncCursorExpired()
+
+    changes = (TransactionChange.query
+               .filter(TransactionChange.user == user_id, TransactionChange.id > after)
+               .order_by(TransactionChange.id)
+               .limit(limit + 1)
+               .all())
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    # Later entries win, so an add followed by a delete nets out to a delete
+    final = {}
+    for change in changes:
+        final[change.transaction_id] = change.op
+    added_ids = [i for i, op in final.items() if op == 'add']
+    added = (Dashinfo.query.filter(Dashinfo.user == user_id, Dashinfo.id.in_(added_ids))
+             .order_by(Dashinfo.date.desc(), Dashinfo.id.desc()).all()) if added_ids else []
+    # A drained log restamps the cursor, so a client that keeps syncing never expires;
+    # mid-pagination the original stamp is kept because older entries remain unread
+    stamp = issued if has_more else now
+    return {
+        'added': [_serialize_transaction(t) for t in added],
+        'deleted': [i for i, op in final.items() if op == 'delete'],
+        'sync_cursor': _encode_cursor('s', changes[-1].id if changes else after, stamp),
+        'has_more': has_more,
+    }
+
 @app.route('/api/transactions', methods=['GET'])
 @login_required
 @limiter.limit("100 per minute")  # Allow more reads for authenticated users
+@user_response_cache('transactions')
 def api_transactions():
+    """Transaction history, newest first.
+
+    Without parameters the full history is returned. ``limit`` (and the
+    ``cursor`` from a previous page's ``next_cursor``) pages through it, and
+    ``since=<sync_cursor>`` returns only the transactions added or deleted
+    since that cursor was issued.
+    """
     try:
-        txs = Dashinfo.query.filter_by(user=current_user.id).order_by(Dashinfo.date.desc()).all()
-        serialized = [
-            {
-                'id': t.id,
-                'ticker': t.ticker,
-                'price': t.price,
-                'amount': t.amount,
-                'type': t.type,
-                'date': t.date.isoformat(),
-                'total': t.total
-            } for t in txs
-        ]
-        return jsonify({'success': True, 'transactions': serialized})
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor')
+        since = request.args.get('since')
+        if limit is not None and not 1 <= limit <= (MAX_SYNC_CHANGES if since else MAX_TRANSACTION_PAGE):
+            return jsonify({'success': False, 'message': 'limit out of range'}), 400
+
+        if since:
+            try:
+                changes = _transaction_changes(current_user.id, since, limit or MAX_SYNC_CHANGES)
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+            except SyncCursorExpired:
+                return jsonify({'success': False, 'resync': True,
+                                'message': 'Sync cursor expired; reload the full history'}), 410
+            return jsonify({'success': True, **changes})
+
+        # Taken before reading rows: changes that race the read are replayed by the next sync
+        sync_cursor = _sync_cursor(current_user.id)
+        query = Dashinfo.query.filter_by(user=current_user.id)
+        if cursor:
+            try:
+                date_str, tx_id = _decode_cursor(cursor, 'p')
+                after_date, after_id = datetime.datetime.fromisoformat(date_str), int(tx_id)
+            except ValueError:
+                return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+            query = query.filter(or_(Dashinfo.date < after_date,
+                                     (Dashinfo.date == after_date) & (Dashinfo.id < after_id)))
+        query = query.order_by(Dashinfo.date.desc(), Dashinfo.id.desc())
+
+        next_cursor = None
+        if limit is None and not cursor:
+            txs = query.all()
+        else:
+            page_size = limit or MAX_TRANSACTION_PAGE
+            txs = query.limit(page_size + 1).all()
+            if len(txs) > page_size:
+                txs = txs[:page_size]
+                next_cursor = _encode_cursor('p', txs[-1].date.isoformat(), txs[-1].id)
+        return jsonify({
+            'success': True,
+            'transactions': [_serialize_transaction(t) for t in txs],
+            'next_cursor': next_cursor,
+            'sync_cursor': sync_cursor,
+        })
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route(IMPORT_PATH, methods=['POST'])
+@login_required
+@limiter.limit("10 per hour")  # Each request may carry many thousands of rows
+def api_import_transactions():
+    """Import transactions from a CSV upload (multipart 'file' field or a text/csv body).
+
+    The import is all-or-nothing: any invalid row rejects the whole file.
+    """
+    try:
+        upload = request.files.get('file')
+        source = upload.stream if upload else request.stream
+        count, tickers = import_transactions(current_user.id, source)
+        db.session.commit()
+        bump_data_version(current_user.id)
+        for ticker in tickers:
+            cached_get_current_price.invalidate(ticker)
+        return jsonify({'success': True, 'imported': count, 'tickers': tickers,
+                        'message': f'Imported {count} transactions'})
+    except ImportValidationError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e), 'errors': e.errors,
+                        'error_count': e.error_count}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @app.route('/api/transactions', methods=['POST'])
 @login_required
 @limiter.limit("60 per hour")  # Limit transaction creation to prevent abuse
@@ -1012,11 +1840,7 @@ def api_add_transaction():
         
         # For SELL transactions, check if user has enough shares
         if transaction_type == 'SELL':
-            buy_sum = db.session.query(func.sum(Dashinfo.amount)).filter_by(user=current_user.id, ticker=ticker, type='BUY').scalar() or 0
-            sell_sum = db.session.query(func.sum(Dashinfo.amount)).filter_by(user=current_user.id, ticker=ticker, type='SELL').scalar() or 0
-            held = buy_sum + sell_sum  # sells are negative
-            
-            if held < shares:
+            if held_shares(current_user.id, ticker) < shares:
                 return jsonify({'success': False, 'message': 'Not enough shares to sell'}), 400
         
         # Parse transaction date if provided, otherwise use current time
@@ -1053,79 +1877,213 @@ def api_add_transaction():
                 total=price * shares
             )
         
-        db.session.add(tx)
+        record_transaction(tx)
         db.session.commit()
+        bump_data_version(current_user.id)
         
         # Clear cache for this ticker
-        cache.delete_memoized(cached_get_current_price, ticker)
+        cached_get_current_price.invalidate(ticker)
         
         return jsonify({'success': True, 'message': f'{transaction_type} transaction added successfully'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+EXPORT_FLUSH_ROWS = 500
+TRANSACTION_EXPORT_FIELDS = ['id', 'date', 'ticker', 'type', 'shares', 'price', 'total']
+POSITION_EXPORT_FIELDS = ['ticker', 'shares_held', 'average_buy_price', 'total_cost_basis', 'realized_pnl',
+                          'current_price', 'total_current_value', 'gain_loss', 'percent_change']
+
+def _export_lines(rows, fields, fmt):
+    """Encode dict rows as CSV (with header) or NDJSON, yielding a chunk every EXPORT_FLUSH_ROWS rows."""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=fields, extrasaction='ignore') if fmt == 'csv' else None
+    if writer:
+        writer.writeheader()
+    for n, row in enumerate(rows, 1):
+        if writer:
+            writer.writerow(row)
+        else:
+            buf.write(json.dumps(row, separators=(',', ':')) + '\n')
+        if n % EXPORT_FLUSH_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+def _export_response(lines, fmt, name):
+    filename = f"{name}-{datetime.date.today():%Y%m%d}.{fmt}"
+    return Response(stream_with_context(lines), mimetype=EXPORT_FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'Cache-Control': 'no-store',
+    })
+
+@app.route('/api/transactions/export', methods=['GET'])
+@login_required
+@limiter.limit("10 per minute")
+def api_export_transactions():
+    """Stream the full transaction history, oldest first, as CSV (importable again) or NDJSON."""
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': 'format must be csv or ndjson'}), 400
+    user_id = current_user.id
+
+    def rows():
+        # Plain column tuples fetched in batches (server-side cursor on PostgreSQL)
+        query = (db.session.query(Dashinfo.id, Dashinfo.date, Dashinfo.ticker, Dashinfo.type,
+                                  Dashinfo.amount, Dashinfo.price, Dashinfo.total)
+                 .filter(Dashinfo.user == user_id)
+                 .order_by(Dashinfo.date, Dashinfo.id)
+                 .yield_per(1000))
+        for tx_id, date, ticker, tx_type, amount, price, total in query:
+            yield {
+                'id': tx_id,
+                'date': date.isoformat(),
+                'ticker': ticker,
+                'type': tx_type,
+                'shares': abs(amount or 0),
+                'price': abs(price),
+                'total': total,
+            }
+
+    return _export_response(_export_lines(rows(), TRANSACTION_EXPORT_FIELDS, fmt), fmt, 'transactions')
+
+@app.route('/api/portfolio/export', methods=['GET'])
+@login_required
+@limiter.limit("10 per minute")
+def api_export_portfolio():
+    """Snapshot of the open positions with current prices as CSV or NDJSON."""
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': 'format must be csv or ndjson'}), 400
+    try:
+        positions = _portfolio_positions(current_user.id)
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+    return _export_response(_export_lines(positions, POSITION_EXPORT_FIELDS, fmt), fmt, 'portfolio')
+
 # ==================== Portfolio API (React) ====================
 @app.route('/api/portfolio/stocks', methods=['GET'])
 @login_required
 @limiter.limit("100 per minute")  # Allow frequent portfolio checks
+@user_response_cache('portfolio', with_prices=True)
 def api_get_portfolio():
     try:
-        transactions = Dashinfo.query.filter_by(user=current_user.id).all()
-        portfolio = {}
-        for tx in transactions:
-            t = tx.ticker
-            if t not in portfolio:
-                portfolio[t] = {
-                    'ticker': t,
-                    'average_buy_price': 0.0,
-                    'current_price': 0.0,
-                    'shares_held': 0,
-                    'total_cost_basis': 0.0,   # renamed internal meaning (buys only)
-                    'total_current_value': 0.0,
-                    'price_change': 0.0,
-                    'percent_change': 0.0,
-                }
-            # Treat positive amount as BUY, negative as SELL (simpler, price sign ignored)
-            if tx.amount > 0:  # BUY
-                portfolio[t]['shares_held'] += tx.amount
-                portfolio[t]['total_cost_basis'] += (abs(tx.price) * tx.amount)
-            elif tx.amount < 0:  # SELL
-                portfolio[t]['shares_held'] += tx.amount  # tx.amount negative reduces holdings
-                # Simplified: do not adjust historical cost basis (no FIFO/LIFO) – unrealized P&L based on remaining shares
-
-        # Post processing calculations
-        result = []
-        for t, data in portfolio.items():
-            shares = data['shares_held']
-            if shares <= 0:
-                # Skip positions fully exited (could return zeroed entry if desired)
-                continue
-            cost_basis = data['total_cost_basis']
-            avg_buy = cost_basis / shares if shares > 0 else 0.0
-            current_price = cached_get_current_price(t)
-            current_value = current_price * shares
-            unrealized_gain = current_value - (avg_buy * shares)
-            price_change = current_price - avg_buy
-            percent_change = (price_change / avg_buy * 100) if avg_buy > 0 else 0.0
-
-            enriched = {
-                'ticker': t,
-                'average_buy_price': round(avg_buy, 6),
-                'current_price': round(current_price, 6),
-                'shares_held': shares,
-                'total_cost_basis': round(cost_basis, 2),
-                'total_current_value': round(current_value, 2),
-                'price_change': round(price_change, 6),
-                'percent_change': round(percent_change, 4),
-                # Compatibility fields for existing React Dashboard component
-                'current_value': round(current_value, 2),
-                'shares': shares,
-                'purchase_price': round(avg_buy, 6),
-                'gain_loss': round(unrealized_gain, 2),
-            }
-            result.append(enriched)
+        return jsonify({'success': True, 'portfolio': _portfolio_positions(current_user.id)})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+def _portfolio_positions(user_id):
+    """Open positions of a user, enriched with current prices."""
+    # Skip positions fully exited (could return zeroed entry if desired)
+    positions = Position.query.filter(Position.user == user_id, Position.shares > 0).order_by(Position.ticker).all()
+    # One batched quote lookup for every held ticker
+    current_prices = cached_get_current_prices([p.ticker for p in positions])
+
+    # Post processing calculations
+    result = []
+    for pos in positions:
+        t = pos.ticker
+        shares = pos.shares
+        cost_basis = pos.cost_basis
+        avg_buy = cost_basis / shares if shares > 0 else 0.0
+        current_price = current_prices[t]
+        current_value = current_price * shares
+        unrealized_gain = current_value - (avg_buy * shares)
+        price_change = current_price - avg_buy
+        percent_change = (price_change / avg_buy * 100) if avg_buy > 0 else 0.0
+
+        enriched = {
+            'ticker': t,
+            'average_buy_price': round(avg_buy, 6),
+            'current_price': round(current_price, 6),
+            'shares_held': shares,
+            'total_cost_basis': round(cost_basis, 2),
+            'total_current_value': round(current_value, 2),
+            'price_change': round(price_change, 6),
+            'percent_change': round(percent_change, 4),
+            'realized_pnl': round(pos.realized_pnl, 2),
+            # Compatibility fields for existing React Dashboard component
+            'current_value': round(current_value, 2),
+            'shares': shares,
+            'purchase_price': round(avg_buy, 6),
+            'gain_loss': round(unrealized_gain, 2),
+        }
+        result.append(enriched)
+
+    return result
 
-        return jsonify({'success': True, 'portfolio': result})
+@app.route('/api/portfolio/history', methods=['GET'])
+@login_required
+@limiter.limit("30 per minute")
+def api_portfolio_history():
+    """Daily portfolio value, net invested cost basis and P&L since the first transaction."""
+    try:
+        rows = (
+            db.session.query(Dashinfo.date, Dashinfo.ticker, Dashinfo.amount, Dashinfo.price)
+            .filter_by(user=current_user.id)
+            .all()
+        )
+        if not rows:
+            return jsonify({'success': True, 'history': portfolio_history([], [], [], [], {})})
+
+        dates, tickers, amounts, prices = zip(*rows)
+        amounts = [a or 0 for a in amounts]
+        # Buys add their cost, sells (negative amounts) subtract their proceeds
+        cash = [abs(p) * a for p, a in zip(prices, amounts)]
+        series = {t: cached_get_stock_data(t) for t in set(tickers)}
+        history = portfolio_history(dates, tickers, amounts, cash, series)
+        return jsonify({'success': True, 'history': history})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+def _portfolio_version(user_id):
+    """Cheap fingerprint of a user's transactions; changes on every insert or delete."""
+    count, max_id = db.session.query(func.count(Dashinfo.id), func.max(Dashinfo.id)).filter_by(user=user_id).one()
+    return f"{count}-{max_id or 0}"
+
+@memo.memoize(timeout=24 * 3600)
+def cached_portfolio_risk(user_id, version, session_date, benchmark, risk_free_rate, lookback):
+    """Risk metrics of a user's holdings; version and session_date only key the memo."""
+    positions = _portfolio_positions(user_id)
+    weights = {p['ticker']: p['total_current_value'] for p in positions}
+    if not weights:
+        return None
+    tickers = set(weights) | {benchmark}
+    series = {t: cached_get_stock_data(t) for t in tickers}
+    return risk_metrics(weights, series, benchmark=benchmark, risk_free_rate=risk_free_rate, lookback=lookback)
+
+@app.route('/api/portfolio/risk', methods=['GET'])
+@login_required
+@limiter.limit("30 per minute")
+def api_portfolio_risk():
+    """Volatility, Sharpe/Sortino, drawdown, beta and correlations of current holdings."""
+    try:
+        benchmark = (request.args.get('benchmark') or 'SPY').strip().upper()
+        try:
+            risk_free_rate = float(request.args.get('risk_free_rate', os.getenv('RISK_FREE_RATE', '0')))
+            lookback = int(request.args.get('lookback', 252))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'risk_free_rate and lookback must be numbers'}), 400
+        if not 20 <= lookback <= 2520:
+            return jsonify({'success': False, 'message': 'lookback must be between 20 and 2520 days'}), 400
+        if len(benchmark) > 10:
+            return jsonify({'success': False, 'message': 'Invalid benchmark ticker'}), 400
+
+        risk = cached_portfolio_risk(
+            current_user.id,
+            _portfolio_version(current_user.id),
+            current_session_date().isoformat(),
+            benchmark,
+            risk_free_rate,
+            lookback,
+        )
+        if risk is None:
+            return jsonify({'success': False, 'message': 'Portfolio has no open positions'}), 404
+        return jsonify({'success': True, 'risk': risk})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 422
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -1176,11 +2134,12 @@ def api_add_portfolio_stock():
             user=current_user.id,
             total=buy_price * shares
         )
-        db.session.add(tx)
+        record_transaction(tx)
         db.session.commit()
+        bump_data_version(current_user.id)
         
         # Clear cache for this ticker
-        cache.delete_memoized(cached_get_current_price, ticker)
+        cached_get_current_price.invalidate(ticker)
         
         return api_get_portfolio()
     except Exception as e:
@@ -1210,12 +2169,7 @@ def api_sell_portfolio_stock():
         if shares <= 0 or sell_price <= 0:
             return jsonify({'success': False, 'message': 'shares and sell_price must be positive'}), 400
         
-        # Compute current held shares
-        buy_sum = db.session.query(func.sum(Dashinfo.amount)).filter_by(user=current_user.id, ticker=ticker, type='BUY').scalar() or 0
-        sell_sum = db.session.query(func.sum(Dashinfo.amount)).filter_by(user=current_user.id, ticker=ticker, type='SELL').scalar() or 0
-        held = buy_sum + sell_sum  # sells are negative
-        
-        if held < shares:
+        if held_shares(current_user.id, ticker) < shares:
             return jsonify({'success': False, 'message': 'Not enough shares to sell'}), 400
         
         # Parse transaction date if provided, otherwise use current time
@@ -1242,11 +2196,12 @@ def api_sell_portfolio_stock():
             user=current_user.id,
             total=sell_price * shares
         )
-        db.session.add(tx)
+        record_transaction(tx)
         db.session.commit()
+        bump_data_version(current_user.id)
         
         # Clear cache for this ticker
-        cache.delete_memoized(cached_get_current_price, ticker)
+        cached_get_current_price.invalidate(ticker)
         
         return api_get_portfolio()
     except Exception as e:
@@ -1262,9 +2217,10 @@ def api_delete_ticker(ticker):
         ticker = (ticker or '').strip().upper()
         if not ticker:
             return jsonify({'success': False, 'message': 'ticker required'}), 400
-        Dashinfo.query.filter_by(user=current_user.id, ticker=ticker).delete()
+        delete_ticker_transactions(current_user.id, ticker)
         db.session.commit()
-        cache.delete_memoized(cached_get_current_price, ticker)
+        bump_data_version(current_user.id)
+        cached_get_current_price.invalidate(ticker)
         return api_get_portfolio()
     except Exception as e:
         db.session.rollback()
@@ -1280,9 +2236,11 @@ def api_security_status():
     """Security monitoring endpoint (admin use only in production)"""
     # In production, you might want to add admin authentication here
     if not is_production or current_user.is_authenticated:
+        tracked = request_tracker.stats()
         return jsonify({
-            'suspicious_ips': len(suspicious_ips),
-            'active_connections': len(request_counts),
+            'suspicious_ips': tracked['suspicious_ips'],
+            'active_connections': tracked['active_ips'],
+            'tracking_scope': tracked['scope'],
             'rate_limits_active': True,
             'max_request_size': app.config.get('MAX_CONTENT_LENGTH', 0) // (1024 * 1024),  # MB
             'environment': 'production' if is_production else 'development'
@@ -1290,6 +2248,28 @@ def api_security_status():
     else:
         return jsonify({'success': False, 'message': 'Unauthorized'}), 401
 
+# Accounts allowed to see internal status in production (defaults to the seeded admin)
+ADMIN_USERNAMES = {u.strip() for u in os.getenv('ADMIN_USERNAMES', os.getenv('DEFAULT_USERNAME', '')).split(',') if u.strip()}
+
+def is_admin():
+    """Whether the current user is one of ADMIN_USERNAMES."""
+    return current_user.is_authenticated and current_user.username in ADMIN_USERNAMES
+
+@app.route('/api/cache/status', methods=['GET'])
+@limiter.limit("10 per minute")
+def api_cache_status():
+    """Memo and image cache counters for this worker (admin use only in production)"""
+    if not is_production or is_admin():
+        return jsonify({
+            'success': True,
+            'pid': os.getpid(),
+            'backend': app.config.get('CACHE_TYPE'),
+            'memo': memo.stats(),
+            'images': image_cache.stats(),
+        })
+    else:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
 # ==================== Database Initialization ====================
 def init_db():
     """Initialize database tables (idempotent)."""
@@ -1335,11 +2315,17 @@ def init_db():
             # Create tables if they don't exist (idempotent)
             db.create_all()
             print("✅ Database tables created successfully")
+            # Upgrade existing tables (indexes etc.) in place
+            run_migrations(db.engine, db.metadata)
             print(f"📊 Database URL: {app.config['SQLALCHEMY_DATABASE_URI']}")
             
             # Verify tables were created by checking User table
             user_count = User.query.count()
             print(f"👥 User count in database: {user_count}")
+
+            # Backfill positions for databases created before the position table existed
+            if Position.query.first() is None and Dashinfo.query.first() is not None:
+                print(f"📈 Rebuilt {rebuild_positions()} positions from transaction history")
             
             _db_initialized = True
     except Exception as e:
@@ -0,0 +1,430 @@
+"""
+In-memory index of the React build served by app.py.
+
+The build directory is scanned once: every file gets its size, mtime,
+content hash and MIME type, small files are kept in memory, and text assets
+get precompressed gzip (and brotli, when the brotli module is installed)
+variants. Prebuilt siblings such as main.js.gz from `npm run compress` are
+reused instead of compressing again. Requests are then answered without
+touching the filesystem, with Accept-Encoding negotiation, strong ETags,
+304 responses, byte ranges (206) and Cache-Control chosen per file.
+
+Files too large to hold in memory (large bundles, GIF/MP4/WebM media) go
+through a FileSender; their prebuilt .br/.gz siblings are indexed by path and
+negotiated the same way. The FileSender is by default Werkzeug's send_file, which answers Range requests
+and hands full-file bodies to the server's wsgi.file_wrapper (sendfile(2)
+under gunicorn). With MEDIA_OFFLOAD set, the front server sends the bytes
+instead and the worker thread is released right away:
+
+- x-accel-redirect (nginx): X-Accel-Redirect: MEDIA_ACCEL_PREFIX + the path
+  relative to the project root, e.g. with the default prefix
+      location /_media/ { internal; alias /app/; }
+- x-sendfile (Apache mod_xsendfile, lighttpd): X-Sendfile: absolute path.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+import time
+
+from flask import Response, request, send_file
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/manifest+json',
+                      'image/svg+xml', 'application/xml', 'image/x-icon', 'image/vnd.microsoft.icon')
+# CRA content hashes: main.3f2a9c1b.js, 787.1c2e5d9a.chunk.css, logo.5d5d9eef.svg
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{8,}\.(?:chunk\.)?[A-Za-z0-9]+$')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'public, max-age=0, must-revalidate'
+MIN_COMPRESS_SIZE = 1024
+# Files up to this size are held in memory; larger ones are streamed from disk
+MAX_MEMORY_FILE = 1024 * 1024
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# Brotli level for the startup scan, and for rebuilds while serving traffic
+BROTLI_QUALITY = 9
+ONLINE_BROTLI_QUALITY = 5
+
+
+class Asset:
+    """One file of the build."""
+
+    __slots__ = ('rel', 'path', 'size', 'mtime', 'etag', 'mimetype', 'cache_control', 'body', 'variants',
+                 'variant_paths')
+
+    def __init__(self, rel, path, size, mtime, etag, mimetype, cache_control, body=None, variants=None,
+                 variant_paths=None):
+        self.rel = rel
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.etag = etag
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self.body = body
+        self.variants = variants or {}  # encoding -> compressed bytes
+        self.variant_paths = variant_paths or {}  # encoding -> prebuilt sibling file (body is None)
+
+
+def _compressible(mimetype):
+    return any(mimetype.startswith(t) for t in COMPRESSIBLE_TYPES)
+
+
+def _variants(body, mimetype, path=None, mtime=0, brotli_quality=BROTLI_QUALITY):
+    """Compressed encodings of body worth serving (smaller than the original).
+
+    Prebuilt path.gz / path.br siblings at least as new as the file are used
+    as-is; pass path=None when body differs from the file on disk.
+    """
+    variants = {}
+    if body is None or len(body) < MIN_COMPRESS_SIZE or not _compressible(mimetype):
+        return variants
+    for encoding, suffix in ENCODINGS:
+        data = _read_sibling(path, suffix, mtime) if path else None
+        if data is None:
+            if encoding == 'br':
+                data = brotli.compress(body, quality=brotli_quality) if brotli is not None else None
+            else:
+                data = gzip.compress(body, compresslevel=9, mtime=0)
+        if data is not None and len(data) < len(body):
+            variants[encoding] = data
+    return variants
+
+
+def _sibling_paths(path, size, mtime, mimetype):
+    """Prebuilt .br/.gz siblings of a file too large to hold in memory."""
+    paths = {}
+    if not _compressible(mimetype):
+        return paths
+    for encoding, suffix in ENCODINGS:
+        try:
+            st = os.stat(path + suffix)
+        except OSError:
+            continue
+        if st.st_mtime >= mtime and st.st_size < size:
+            paths[encoding] = path + suffix
+    return paths
+
+
+def _read_sibling(path, suffix, mtime):
+    sibling = path + suffix
+    try:
+        if os.path.getmtime(sibling) >= mtime:
+            with open(sibling, 'rb') as f:
+                return f.read()
+    except OSError:
+        pass
+    return None
+
+
+class AssetIndex:
+    """Startup-built manifest of a build directory.
+
+    Args:
+        root (str): Build directory (static/frontend).
+        memory_budget (int): Total bytes of file bodies kept in memory.
+    """
+
+    def __init__(self, root, memory_budget=64 * 1024 * 1024):
+        self.root = os.path.abspath(root)
+        self.memory_budget = memory_budget
+        self._assets = {}
+        self._lock = threading.Lock()
+        self.scan()
+
+    def scan(self, brotli_quality=BROTLI_QUALITY):
+        """(Re)build the index from disk.
+
+        Args:
+            brotli_quality (int): Brotli level for files without a prebuilt .br.
+
+        Returns:
+            int: Number of indexed files.
+        """
+        assets, used = {}, 0
+        if os.path.isdir(self.root):
+            for dirpath, _, filenames in os.walk(self.root):
+                for name in filenames:
+                    # Precompressed siblings are picked up with their source file
+                    if name.endswith(('.gz', '.br')) and os.path.exists(os.path.join(dirpath, name[:-3])):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    rel = os.path.relpath(path, self.root).replace(os.sep, '/')
+                    asset = self._load(rel, path, self.memory_budget - used, brotli_quality)
+                    if asset is not None:
+                        assets[rel] = asset
+                        used += len(asset.body or b'') + sum(len(v) for v in asset.variants.values())
+        with self._lock:
+            self._assets = assets
+        return len(assets)
+
+    def _load(self, rel, path, memory_left, brotli_quality):
+        try:
+            st = os.stat(path)
+            digest = hashlib.sha256()
+            keep = st.st_size <= min(MAX_MEMORY_FILE, max(memory_left, 0))
+            chunks = []
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+                    if keep:
+                        chunks.append(chunk)
+        except OSError:
+            return None
+        body = b''.join(chunks) if keep else None
+        mimetype = mimetypes.guess_type(rel)[0] or 'application/octet-stream'
+        name = rel.rsplit('/', 1)[-1]
+        return Asset(
+            rel=rel, path=path, size=st.st_size, mtime=st.st_mtime,
+            etag=digest.hexdigest()[:32], mimetype=mimetype,
+            cache_control=IMMUTABLE_CACHE if HASHED_NAME_RE.search(name) else REVALIDATE_CACHE,
+            body=body, variants=_variants(body, mimetype, path, st.st_mtime, brotli_quality),
+            variant_paths=None if keep else _sibling_paths(path, st.st_size, st.st_mtime, mimetype),
+        )
+
+    def get(self, rel):
+        """Asset for a build-relative path, or None."""
+        return self._assets.get(rel)
+
+    def stats(self):
+        assets = list(self._assets.values())
+        return {
+            'files': len(assets),
+            'memory_bytes': sum(len(a.body or b'') + sum(len(v) for v in a.variants.values()) for a in assets),
+            'compressed_files': sum(1 for a in assets if a.variants or a.variant_paths),
+            'brotli': brotli is not None,
+        }
+
+
+class IndexShell:
+    """index.html held in memory and reloaded when the build changes.
+
+    The file is stat'ed at most once per check_interval seconds. A changed
+    mtime or size starts a reload in a background thread, which calls
+    on_change first (e.g. to rescan the asset index after an in-place deploy)
+    and then swaps in the new shell; requests keep getting the previous shell
+    until then. Only the very first load runs in the calling thread.
+
+    Args:
+        root (str): Build directory.
+        check_interval (float): Minimum seconds between stat() calls.
+        preload_hints (bool): Add <link rel="preload"> tags for the
+            entrypoints listed in asset-manifest.json.
+        on_change (callable): Called on the reload thread before a changed
+            shell is swapped in.
+    """
+
+    def __init__(self, root, check_interval=2.0, preload_hints=False, on_change=None):
+        self.path = os.path.join(root, 'index.html')
+        self.manifest_path = os.path.join(root, 'asset-manifest.json')
+        self.check_interval = check_interval
+        self.preload_hints = preload_hints
+        self.on_change = on_change
+        self._asset = None
+        self._stamp = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._reloading = False
+        self.reloads = 0
+
+    def get(self):
+        """Current shell as an Asset, or None when the build is missing."""
+        now = time.monotonic()
+        if now >= self._next_check:
+            with self._lock:
+                if now >= self._next_check:
+                    self._check()
+                    self._next_check = now + self.check_interval
+        return self._asset
+
+    def _check(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._asset, self._stamp = None, None
+            return
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp or self._reloading:
+            return
+        if self._asset is None:
+            # Nothing to serve yet: load inline
+            self._reload(st, stamp)
+            return
+        self._reloading = True
+        threading.Thread(target=self._reload_in_background, args=(st, stamp),
+                         name='index-shell-reload', daemon=True).start()
+
+    def _reload_in_background(self, st, stamp):
+        try:
+            self._reload(st, stamp)
+        except Exception as e:
+            print(f"Warning: could not reload {self.path}: {e}")
+        finally:
+            self._reloading = False
+
+    def _reload(self, st, stamp):
+        try:
+            with open(self.path, 'rb') as f:
+                body = f.read()
+        except OSError as e:
+            print(f"Warning: could not read {self.path}: {e}")
+            return
+        if self.preload_hints:
+            body = self._with_preload_hints(body)
+        asset = Asset(
+            rel='index.html', path=self.path, size=len(body), mtime=st.st_mtime,
+            etag=hashlib.sha256(body).hexdigest()[:32], mimetype='text/html',
+            cache_control='no-cache', body=body,
+            variants=_variants(body, 'text/html', None if self.preload_hints else self.path, st.st_mtime,
+                               ONLINE_BROTLI_QUALITY),
+        )
+        # The new shell may reference new hashed files: index them before it is served
+        if self._stamp is not None and self.on_change is not None:
+            self.on_change()
+        self._asset, self._stamp = asset, stamp
+        self.reloads += 1
+
+    def _with_preload_hints(self, body):
+        try:
+            with open(self.manifest_path) as f:
+                entrypoints = json.load(f).get('entrypoints', [])
+        except (OSError, ValueError):
+            return body
+        html = body.decode('utf-8')
+        links = []
+        for entry in entrypoints:
+            href = '/' + entry.lstrip('/')
+            kind = 'script' if entry.endswith('.js') else 'style' if entry.endswith('.css') else None
+            if kind and f'rel="preload" href="{href}"' not in html:
+                links.append(f'<link rel="preload" href="{href}" as="{kind}">')
+        if not links or '<head>' not in html:
+            return body
+        # Right after <head> so the fetches start before anything else is parsed
+        return html.replace('<head>', '<head>' + ''.join(links), 1).encode('utf-8')
+
+
+def _negotiate(variants, identity):
+    """Best available (encoding, representation) for the request's Accept-Encoding."""
+    for encoding, _ in ENCODINGS:
+        if encoding in variants and request.accept_encodings[encoding] > 0:
+            return encoding, variants[encoding]
+    return None, identity
+
+
+class FileSender:
+    """Sends files from disk, optionally offloading the body to the front server.
+
+    Args:
+        mode (str): '' (send from the worker), 'x-accel-redirect' or 'x-sendfile'.
+        root (str): Directory that MEDIA_ACCEL_PREFIX maps to (x-accel-redirect).
+        accel_prefix (str): Internal nginx location for the root.
+        min_bytes (int): Smaller files are always sent by the worker.
+    """
+
+    MODES = ('', 'x-accel-redirect', 'x-sendfile')
+
+    def __init__(self, mode='', root='/', accel_prefix='/_media/', min_bytes=1024 * 1024):
+        if mode not in self.MODES:
+            print(f"Warning: unknown MEDIA_OFFLOAD mode {mode!r}; sending files from the worker")
+            mode = ''
+        self.mode = mode
+        self.root = os.path.abspath(root)
+        self.accel_prefix = '/' + accel_prefix.strip('/') + '/'
+        self.min_bytes = min_bytes
+
+    def _offload_header(self, path):
+        if self.mode == 'x-sendfile':
+            return 'X-Sendfile', path
+        rel = os.path.relpath(path, self.root)
+        if rel.startswith('..'):
+            return None
+        return 'X-Accel-Redirect', self.accel_prefix + rel.replace(os.sep, '/')
+
+    def send(self, path, mimetype=None, etag=True, last_modified=None, cache_control=None, size=None):
+        """Response for a file, honouring conditional and Range requests.
+
+        Args:
+            path (str): Absolute file path.
+            mimetype (str): Content type (guessed from the name if omitted).
+            etag (str or bool): ETag, or True to derive one from mtime/size.
+            last_modified (float): Modification time (stat'ed if omitted).
+            cache_control (str): Cache-Control header value.
+            size (int): File size, if already known.
+
+        Returns:
+            Response: The file, a 206/304, or an empty offload response.
+        """
+        header = None
+        if self.mode:
+            if size is None or last_modified is None:
+                st = os.stat(path)
+                size, last_modified = st.st_size, st.st_mtime
+            if size >= self.min_bytes:
+                header = self._offload_header(os.path.abspath(path))
+        if header is None:
+            # Range/206 and wsgi.file_wrapper (sendfile) are handled by Werkzeug
+            response = send_file(path, mimetype=mimetype, etag=etag, last_modified=last_modified, conditional=True)
+        else:
+            # The front server reads the file and serves ranges itself
+            response = Response(mimetype=mimetype or mimetypes.guess_type(path)[0] or 'application/octet-stream')
+            response.headers[header[0]] = header[1]
+            if etag is True:
+                etag = f"{int(last_modified)}-{size}"
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            response.make_conditional(request)
+        if cache_control:
+            response.headers['Cache-Control'] = cache_control
+        return response
+
+
+def sender_from_env(root):
+    """FileSender configured from MEDIA_OFFLOAD* environment variables."""
+    return FileSender(
+        mode=os.getenv('MEDIA_OFFLOAD', '').strip().lower(),
+        root=root,
+        accel_prefix=os.getenv('MEDIA_ACCEL_PREFIX', '/_media/'),
+        min_bytes=int(os.getenv('MEDIA_OFFLOAD_MIN_BYTES', str(1024 * 1024))),
+    )
+
+
+_default_sender = FileSender()
+
+
+def serve_asset(asset, sender=None):
+    """Response for an indexed asset, honouring If-None-Match and Range."""
+    if asset.body is None:
+        # Large file: sent from disk (or its prebuilt sibling) with the indexed validators
+        encoding, path = _negotiate(asset.variant_paths, asset.path)
+        response = (sender or _default_sender).send(
+            path, mimetype=asset.mimetype, etag=f"{asset.etag}-{encoding}" if encoding else asset.etag,
+            last_modified=asset.mtime, cache_control=asset.cache_control,
+            size=None if encoding else asset.size)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if asset.variant_paths:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    encoding, body = _negotiate(asset.variants, asset.body)
+    response = Response(body, mimetype=asset.mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    # Each representation needs its own strong ETag
+    response.set_etag(f"{asset.etag}-{encoding}" if encoding else asset.etag)
+    response.last_modified = asset.mtime
+    response.headers['Cache-Control'] = asset.cache_control
+    if asset.variants:
+        response.vary.add('Accept-Encoding')
+    response.accept_ranges = 'bytes'
+    # 304 for If-None-Match / If-Modified-Since, 206 for satisfiable ranges
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(body))
@@ -0,0 +1,399 @@
+"""
+Memoization helpers for the expensive finance lookups in app.py.
+
+Memoizer wraps the Flask-Caching backend with two policies:
+
+- Request coalescing: when a memo entry is missing only one caller per key
+  computes it, while the others wait (bounded) for its result. Threads of one
+  worker coordinate through an in-process event; workers coordinate through a
+  short-lived lock key created with the backend's atomic add().
+- Stale-while-revalidate: entries are stored with a freshness deadline and
+  kept in the backend for an extra stale window. An expired entry is still
+  returned immediately while a background thread refreshes it.
+
+Freshness lifetimes may be callables (see market_calendar.market_ttl) so they
+can follow the exchange calendar. With an invalidation bus (see
+backend.invalidation) entries also record the key's generation from before
+their value was computed, and invalidate() reaches every worker.
+
+An optional LocalLRU acts as an in-process L1 in front of the shared backend
+(L2). L1 only holds fresh entries, expires them when they turn stale and
+checks the same bus generations, so both tiers stay coherent.
+"""
+import functools
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _InFlight:
+    """A computation currently running in this process."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.ok = False
+        self.value = None
+
+
+class LocalLRU:
+    """Thread-safe in-process LRU with a byte budget and per-entry expiry.
+
+    Values are stored pickled, like the shared backends do, and every get
+    returns a fresh copy; sizes are the pickled lengths.
+
+    Args:
+        max_bytes (int): Budget for the sum of entry sizes.
+        max_ttl (float): Upper bound on how long an entry is kept.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_ttl=60.0):
+        self.max_bytes = max_bytes
+        self.max_ttl = max_ttl
+        self._data = OrderedDict()  # key -> (pickled value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if time.monotonic() >= item[2]:
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            data = item[0]
+        # Every hit unpickles its own copy, so callers cannot mutate the cached value
+        return pickle.loads(data)
+
+    def set(self, key, value, ttl):
+        ttl = min(ttl, self.max_ttl)
+        if ttl <= 0:
+            return
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (data, size, time.monotonic() + ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._data), 'bytes': self._bytes,
+                    'max_bytes': self.max_bytes, 'evictions': self.evictions}
+
+
+class Memoizer:
+    """Coalescing, stale-while-revalidate memoize decorator on a Flask-Caching Cache.
+
+    Args:
+        cache: Flask-Caching Cache instance used as storage.
+        wait_timeout (float): Seconds a caller waits for another caller's
+            in-flight computation before computing the value itself.
+        lock_timeout (float): Lifetime of the cross-worker lock key, so a
+            crashed worker can never hold a key forever.
+        refresh_workers (int): Size of the background refresh thread pool.
+        bus: Optional invalidation bus shared by all workers.
+        l1: Optional LocalLRU consulted before the cache backend.
+    """
+
+    def __init__(self, cache, wait_timeout=15.0, lock_timeout=30.0, refresh_workers=4, bus=None, l1=None):
+        self.cache = cache
+        self.bus = bus
+        self.l1 = l1
+        # Approximate under concurrency (unlocked increments); for monitoring only
+        self.counters = {'l1_hits': 0, 'l1_misses': 0, 'l2_hits': 0, 'l2_misses': 0}
+        self.wait_timeout = wait_timeout
+        self.lock_timeout = lock_timeout
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(
+            max_workers=refresh_workers, thread_name_prefix='memo-refresh'
+        )
+
+    def memoize(self, timeout, stale_timeout=0, failed=None, failure_timeout=60):
+        """Decorator caching f's result per positional arguments.
+
+        Args:
+            timeout (int | callable): Seconds an entry is fresh, or a callable
+                returning that number when the entry is stored.
+            stale_timeout (int): Extra seconds an expired entry may still be
+                served while it is refreshed in the background.
+            failed (callable): Predicate marking a result as a failed fetch
+                (e.g. a 0.0 price). Failures are kept only failure_timeout
+                seconds with no stale window, and a background refresh that
+                fails keeps serving the previous value.
+            failure_timeout (int): Lifetime of a failed result.
+        """
+        def decorator(f):
+            name = f"memo:{f.__module__}.{f.__qualname__}"
+
+            def make_cache_key(*args):
+                return name + ':' + ':'.join(repr(a) for a in args)
+
+            def is_failure(value):
+                return failed is not None and failed(value)
+
+            def lifetimes(value):
+                if is_failure(value):
+                    return failure_timeout, 0
+                return decorated_function.cache_timeout, stale_timeout
+
+            def store(key, value, generation):
+                self._store(key, value, generation, *lifetimes(value))
+
+            def refresh_store(key, value, generation):
+                # An outage during a refresh must not replace the last good value
+                if not is_failure(value):
+                    store(key, value, generation)
+
+            @functools.wraps(f)
+            def decorated_function(*args):
+                key = make_cache_key(*args)
+                entry = self._get(key)
+                if entry is not None:
+                    value, fresh_until, _ = entry
+                    if time.time() >= fresh_until:
+                        self._refresh_in_background(key, lambda: f(*args), refresh_store)
+                    return value
+                return self._coalesce(key, lambda: f(*args), store)
+
+            def invalidate(*args):
+                key = make_cache_key(*args)
+                if self.bus is not None:
+                    self.bus.invalidate(key)
+                if self.l1 is not None:
+                    self.l1.delete(key)
+                self.cache.delete(key)
+
+            def get_many(arg_tuples, refresh_many=None):
+                """Cached values for each argument tuple (None on a miss).
+
+                Stale values are returned as well. When refresh_many is given it
+                is called in the background with the stale argument tuples this
+                worker managed to lock, and must return their new values.
+                """
+                if not arg_tuples:
+                    return []
+                now = time.time()
+                keys = [make_cache_key(*a) for a in arg_tuples]
+                entries = self._get_many(keys)
+                stale = [
+                    (a, k) for a, k, e in zip(arg_tuples, keys, entries)
+                    if e is not None and now >= e[1]
+                ]
+                if stale and refresh_many is not None:
+                    self._refresh_many_in_background(stale, refresh_many, refresh_store)
+                return [e[0] if e is not None else None for e in entries]
+
+            def set_many(items):
+                """Store precomputed (argument tuple, value) pairs."""
+                now = time.time()
+                # Good values and failures get different lifetimes: one set_many each
+                for failures in (False, True):
+                    group = [(a, v) for a, v in items if v is not None and is_failure(v) == failures]
+                    if not group:
+                        continue
+                    fresh, hard = self._lifetimes(*lifetimes(group[0][1]))
+                    keys = [make_cache_key(*a) for a, _ in group]
+                    entries = {k: (v, now + fresh, self._generation(k)) for k, (_, v) in zip(keys, group)}
+                    self.cache.set_many(entries, timeout=hard)
+                    if self.l1 is not None:
+                        for k, entry in entries.items():
+                            self.l1.set(k, entry, fresh)
+
+            decorated_function.uncached = f
+            decorated_function.cache_timeout = timeout
+            decorated_function.make_cache_key = make_cache_key
+            decorated_function.invalidate = invalidate
+            decorated_function.get_many = get_many
+            decorated_function.set_many = set_many
+            return decorated_function
+        return decorator
+
+    @staticmethod
+    def _lifetimes(timeout, stale_timeout):
+        fresh = timeout() if callable(timeout) else timeout
+        return fresh, int(fresh + stale_timeout)
+
+    def _generation(self, key):
+        return self.bus.generation(key) if self.bus is not None else 0
+
+    def _valid(self, key, entry):
+        """entry unless it is missing, malformed or invalidated since it was computed."""
+        if entry is None or len(entry) != 3:
+            return None
+        if self.bus is not None and entry[2] != self.bus.generation(key):
+            return None
+        return entry
+
+    def _get(self, key):
+        """Valid entry from L1, else from the backend (promoted to L1 while fresh)."""
+        if self.l1 is not None:
+            entry = self._valid(key, self.l1.get(key))
+            if entry is not None:
+                self.counters['l1_hits'] += 1
+                return entry
+            self.counters['l1_misses'] += 1
+        entry = self._valid(key, self.cache.get(key))
+        self.counters['l2_hits' if entry is not None else 'l2_misses'] += 1
+        if entry is not None and self.l1 is not None:
+            self.l1.set(key, entry, entry[1] - time.time())
+        return entry
+
+    def _get_many(self, keys):
+        entries = [None] * len(keys)
+        missing = list(range(len(keys)))
+        if self.l1 is not None:
+            for i, k in enumerate(keys):
+                entries[i] = self._valid(k, self.l1.get(k))
+            missing = [i for i, e in enumerate(entries) if e is None]
+            self.counters['l1_hits'] += len(keys) - len(missing)
+            self.counters['l1_misses'] += len(missing)
+        if missing:
+            now = time.time()
+            fetched = self.cache.get_many(*[keys[i] for i in missing])
+            for i, entry in zip(missing, fetched):
+                entry = self._valid(keys[i], entry)
+                entries[i] = entry
+                self.counters['l2_hits' if entry is not None else 'l2_misses'] += 1
+                if entry is not None and self.l1 is not None:
+                    self.l1.set(keys[i], entry, entry[1] - now)
+        return entries
+
+    def stats(self):
+        """Hit/miss counters per tier plus L1 occupancy."""
+        stats = dict(self.counters)
+        if self.l1 is not None:
+            stats['l1'] = self.l1.stats()
+        if self.bus is not None:
+            stats['bus'] = self.bus.stats()
+        return stats
+
+    def _store(self, key, value, generation, timeout, stale_timeout):
+        if value is None:
+            return
+        fresh, hard = self._lifetimes(timeout, stale_timeout)
+        entry = (value, time.time() + fresh, generation)
+        self.cache.set(key, entry, timeout=hard)
+        if self.l1 is not None:
+            self.l1.set(key, entry, fresh)
+
+    def _compute(self, key, compute, store):
+        # Read the generation first so an invalidation racing compute() wins
+        generation = self._generation(key)
+        rv = compute()
+        store(key, rv, generation)
+        return rv
+
+    def _refresh_in_background(self, key, compute, store):
+        """Recompute a stale entry off the request path, at most once fleet-wide."""
+        lock_key = key + ':lock'
+        if not self.cache.add(lock_key, 1, timeout=self.lock_timeout):
+            return
+
+        def run():
+            try:
+                self._compute(key, compute, store)
+            except Exception as e:
+                print(f"Warning: background refresh of {key} failed: {e}")
+            finally:
+                self.cache.delete(lock_key)
+
+        try:
+            self._refresher.submit(run)
+        except RuntimeError:
+            # Executor shut down (interpreter exiting)
+            self.cache.delete(lock_key)
+
+    def _refresh_many_in_background(self, stale, refresh_many, store):
+        """Batched variant of _refresh_in_background for (args, key) pairs."""
+        locked = [(a, k) for a, k in stale if self.cache.add(k + ':lock', 1, timeout=self.lock_timeout)]
+        if not locked:
+            return
+
+        def run():
+            try:
+                generations = [self._generation(k) for _, k in locked]
+                values = refresh_many([a for a, _ in locked])
+                for (_, k), value, generation in zip(locked, values, generations):
+                    store(k, value, generation)
+            except Exception as e:
+                print(f"Warning: background refresh of {len(locked)} entries failed: {e}")
+            finally:
+                self.cache.delete_many(*[k + ':lock' for _, k in locked])
+
+        try:
+            self._refresher.submit(run)
+        except RuntimeError:
+            self.cache.delete_many(*[k + ':lock' for _, k in locked])
+
+    def _coalesce(self, key, compute, store):
+        with self._inflight_lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+
+        if not leader:
+            # Another thread of this worker is already fetching the key
+            if call.event.wait(self.wait_timeout) and call.ok:
+                return call.value
+            return self._compute(key, compute, store)
+
+        try:
+            call.value = self._lead(key, compute, store)
+            call.ok = True
+            return call.value
+        finally:
+            call.event.set()
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _lead(self, key, compute, store):
+        """Fetch key for this worker, deferring to another worker holding its lock."""
+        lock_key = key + ':lock'
+        if self.cache.add(lock_key, 1, timeout=self.lock_timeout):
+            try:
+                return self._compute(key, compute, store)
+            finally:
+                self.cache.delete(lock_key)
+
+        deadline = time.monotonic() + self.wait_timeout
+        delay = 0.05
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            entry = self._valid(key, self.cache.get(key))
+            if entry is not None:
+                return entry[0]
+            if not self.cache.has(lock_key):
+                # The other worker finished without storing a value
+                break
+            delay = min(delay * 2, 0.5)
+        return self._compute(key, compute, store)
@@ -2,326 +2,274 @@
 # Author: Maycon Meier 
 # Source: https://en.wikipedia.org/wiki/Shear_modulus
 
+import functools
+from collections import namedtuple
+from fractions import Fraction
+
 import numpy as np
 
 run_tests = False
 
+# ==================== Unit registry ====================
+# Unit expressions are dot separated tokens; "/" before a token puts it in the
+# denominator and "**n" raises it to a power, e.g. "BTU./ft**2./hr./degF".
+# Every expression compiles to a scale factor (to SI) and a vector of exponents
+# over the base dimensions below, so two expressions convert into each other
+# exactly when their vectors match.
+
+DIMENSIONS = ('m', 'kg', 's', 'K', 'A', 'cd')
+MAX_EXPONENT = 10
+
+PREFIXES = {
+    'Y': 1.0e24, 'Z': 1.0e21, 'E': 1.0e18, 'P': 1.0e15, 'T': 1.0e12, 'G': 1.0e9, 'M': 1.0e6, 'k': 1.0e3,
+    'h': 1.0e2, 'da': 1.0e1, 'd': 1.0e-1, 'c': 1.0e-2, 'mi': 1.0e-3, 'mc': 1.0e-6, 'n': 1.0e-9, 'p': 1.0e-12,
+    'f': 1.0e-15, 'a': 1.0e-18, 'z': 1.0e-21, 'yo': 1.0e-24,
+}
+
+# name -> (scale, definition). Definitions are expressions over units listed
+# earlier; base units use their own dimension name.
+UNIT_DEFINITIONS = {
+    # Base units
+    'm': (1.0, 'm'), 'kg': (1.0, 'kg'), 's': (1.0, 's'), 'K': (1.0, 'K'), 'A': (1.0, 'A'), 'cd': (1.0, 'cd'),
+    'sr': (1.0, ''),
+    # Length
+    'in': (0.0254, 'm'), 'ft': (0.3048, 'm'), 'yd': (0.9144, 'm'), 'mile': (1609.344, 'm'), 'nmile': (1852.0, 'm'),
+    'mm': (1.0e-3, 'm'), 'cm': (1.0e-2, 'm'), 'km': (1.0e3, 'm'),
+    # Mass
+    'g': (1.0e-3, 'kg'), 'lb': (0.45359237, 'kg'), 'oz': (0.028349523125, 'kg'), 'slug': (14.5939029372, 'kg'),
+    'stone': (6.35029318, 'kg'), 'tone': (1000.0, 'kg'), 'ton': (907.18474, 'kg'), 'ukton': (1016.0469088, 'kg'),
+    # Time (month = 30 days, year = 365 days)
+    'min': (60.0, 's'), 'hr': (3600.0, 's'), 'day': (86400.0, 's'), 'week': (604800.0, 's'),
+    'month': (2592000.0, 's'), 'year': (31536000.0, 's'),
+    # Temperature intervals; absolute scales are handled by TEMPERATURE_SCALES
+    'degC': (1.0, 'K'), 'degF': (5 / 9, 'K'), 'R': (5 / 9, 'K'),
+    # Charge
+    'el': (1.602176634e-19, 'A.s'),  # elementary charge
+    # SI derived
+    'N': (1.0, 'kg.m./s**2'), 'Hz': (1.0, '/s'), 'Bq': (1.0, '/s'), 'Pa': (1.0, 'N./m**2'), 'J': (1.0, 'N.m'),
+    'W': (1.0, 'J./s'), 'C': (1.0, 'A.s'), 'V': (1.0, 'W./A'), 'F': (1.0, 'C./V'), 'Ohm': (1.0, 'V./A'),
+    'S': (1.0, 'A./V'), 'Wb': (1.0, 'V.s'), 'T': (1.0, 'Wb./m**2'), 'H': (1.0, 'Wb./A'), 'Gy': (1.0, 'J./kg'),
+    'lm': (1.0, 'cd.sr'), 'lx': (1.0, 'lm./m**2'),
+    'kN': (1.0e3, 'N'), 'kJ': (1.0e3, 'J'), 'kPa': (1.0e3, 'Pa'), 'MPa': (1.0e6, 'Pa'), 'GPa': (1.0e9, 'Pa'),
+    # Velocity
+    'mph': (1.0, 'mile./hr'), 'kph': (1.0, 'km./hr'),
+    # Force (lbi: the inch-based mass unit behind psi)
+    'lbf': (4.4482216152605, 'N'), 'kip': (1000.0, 'lbf'), 'lbi': (12 * 32.174049, 'lb'),
+    # Pressure
+    'psi': (1.0, 'lbf./in**2'), 'psf': (1.0, 'lbf./ft**2'), 'bar': (1.0e5, 'Pa'), 'atm': (101325.0, 'Pa'),
+    'mH2O': (9806.65, 'Pa'), 'ftH2O': (2989.0669, 'Pa'), 'mmHg': (133.322387415, 'Pa'), 'inHg': (3386.38816, 'Pa'),
+    # Volume (US customary)
+    'L': (1.0e-3, 'm**3'), 'Liter': (1.0e-3, 'm**3'), 'gallon': (231.0, 'in**3'), 'quart': (57.75, 'in**3'),
+    'pint': (28.875, 'in**3'), 'floz': (1.8046875, 'in**3'), 'tbsp': (0.5, 'floz'), 'tsp': (1 / 3, 'tbsp'),
+    # Energy and power
+    'BTU': (1054.8, 'J'), 'IT': (1055.06, 'J'), 'BTUc': (1054.68, 'J'), 'BTUt': (1054.35, 'J'),
+    'BTUcal': (1059.67, 'J'), 'cal': (4.1868, 'J'), 'calt': (4.184, 'J'), 'cal4': (4.204, 'J'),
+    'cal15': (4.1855, 'J'), 'cal20': (4.182, 'J'), 'calmean': (4.190, 'J'), 'calit': (4.1868, 'J'),
+    'eV': (1.602176634e-19, 'J'), 'toneTNT': (4.184e9, 'J'), 'TNT': (4.184e9, 'J./ton'),
+    'ccf': (1.0e5, 'IT'), 'hp': (745.69987158, 'W'),
+}
+
+# Absolute temperature scales: kelvin = value * scale + offset (exact, so that
+# e.g. 100 degC gives 212 degF rather than 211.99999999999994)
+TEMPERATURE_SCALES = {
+    'K': (Fraction(1), Fraction(0)),
+    'degC': (Fraction(1), Fraction('273.15')),
+    'degF': (Fraction(5, 9), Fraction('459.67') * Fraction(5, 9)),
+    'R': (Fraction(5, 9), Fraction(0)),
+}
+
+CompiledUnit = namedtuple('CompiledUnit', ['scale', 'dims'])
+
+
+def _parse_token(token):
+    """Split "/name**n" into (name, signed exponent)."""
+    inverse = token.startswith('/')
+    name = token[1:] if inverse else token
+    exponent = 1
+    if '**' in name:
+        name, power = name.split('**', 1)
+        try:
+            exponent = int(power)
+        except ValueError:
+            raise ValueError(f"Invalid exponent in '{token}'")
+        if abs(exponent) > MAX_EXPONENT:
+            raise ValueError("Exponents are too large. Stopping here for security.")
+    if not name:
+        raise ValueError(f"Invalid unit token '{token}'")
+    return name, -exponent if inverse else exponent
+
+
+def _compile(expression, registry):
+    scale = 1.0
+    dims = [0] * len(DIMENSIONS)
+    for token in expression.split('.'):
+        if not token:
+            continue
+        name, exponent = _parse_token(token.strip())
+        if name in registry:
+            unit = registry[name]
+            scale *= unit.scale ** exponent
+            for i, d in enumerate(unit.dims):
+                dims[i] += d * exponent
+        elif name in PREFIXES:
+            scale *= PREFIXES[name] ** exponent
+        else:
+            raise ValueError(f"Unknown unit '{name}'")
+    return CompiledUnit(scale, tuple(dims))
+
+
+def _build_registry():
+    registry = {name: CompiledUnit(1.0, tuple(int(d == name) for d in DIMENSIONS)) for name in DIMENSIONS}
+    for name, (scale, definition) in UNIT_DEFINITIONS.items():
+        if name in DIMENSIONS:
+            continue
+        unit = _compile(definition, registry)
+        registry[name] = CompiledUnit(scale * unit.scale, unit.dims)
+    return registry
+
+
+UNITS = _build_registry()
+
+
+@functools.lru_cache(maxsize=2048)
+def compile_unit(expression):
+    """Scale factor (to SI) and dimension vector of a unit expression.
+
+    Args:
+        expression (str): Unit expression, e.g. "N./mm**2".
+
+    Returns:
+        CompiledUnit: (scale, dims) with dims ordered as DIMENSIONS.
+
+    Raises:
+        ValueError: On unknown units or malformed tokens.
+    """
+    return _compile(expression, UNITS)
+
+
+class ConversionPlan(namedtuple('ConversionPlan', ['factor', 'offset'])):
+    """Compiled conversion: output = value * factor + offset."""
+
+    __slots__ = ()
+
+    @property
+    def ratio(self):
+        return self.factor
+
+    def apply(self, value):
+        """Convert a scalar, list or NumPy array of values."""
+        if isinstance(value, (list, tuple)):
+            value = np.asarray(value, dtype=float)
+        if self.offset:
+            return value * self.factor + self.offset
+        return value * self.factor
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_conversion(input_unit, output_unit):
+    """Conversion plan between two unit expressions (memoized per pair).
+
+    A lone temperature unit on both sides converts absolute temperatures
+    (degC <-> degF applies the offset); anywhere else temperature units are
+    intervals, as in W./m./K.
+
+    Raises:
+        ValueError: On unknown units or units of different dimensions.
+    """
+    if input_unit in TEMPERATURE_SCALES and output_unit in TEMPERATURE_SCALES:
+        (s_in, o_in), (s_out, o_out) = TEMPERATURE_SCALES[input_unit], TEMPERATURE_SCALES[output_unit]
+        return ConversionPlan(float(s_in / s_out), float((o_in - o_out) / s_out))
+    source = compile_unit(input_unit)
+    target = compile_unit(output_unit)
+    if source.dims != target.dims:
+        raise ValueError("Input and Output units are not equivalent")
+    return ConversionPlan(source.scale / target.scale, 0.0)
+
+
+def batch_values(values, max_values):
+    """Validate the values of a batch conversion request (parsed JSON).
+
+    Args:
+        values: Should be a non-empty flat list of numbers.
+        max_values (int): Largest accepted list length.
+
+    Returns:
+        np.ndarray: The values as floats.
+
+    Raises:
+        ValueError: With a message for the client if values are invalid.
+    """
+    if not isinstance(values, list) or not values:
+        raise ValueError('values must be a non-empty list')
+    if len(values) > max_values:
+        raise ValueError(f'At most {max_values} values per request')
+    if any(isinstance(v, (list, dict)) for v in values):
+        raise ValueError('values must be a flat list of numbers')
+    # bool is an int subclass: true/false would otherwise convert as 1/0
+    if any(isinstance(v, (bool, str)) or v is None for v in values):
+        raise ValueError('values must be numbers')
+    numbers = np.asarray(values, dtype=float)
+    if not np.isfinite(numbers).all():
+        raise ValueError('values must be finite numbers')
+    return numbers
+
+
+def convert_batch(values, input_units, output_units):
+    """Convert many values at once.
+
+    Each distinct (input, output) pair is compiled once; the values are then
+    converted with one vectorized multiply-add.
+
+    Args:
+        values: List or NumPy array of numbers.
+        input_units (str or list): One unit for all values, or one per value.
+        output_units (str or list): One unit for all values, or one per value.
+
+    Returns:
+        np.ndarray: Converted values (float).
+
+    Raises:
+        ValueError: On unknown or incompatible units, or mismatched lengths.
+    """
+    values = np.asarray(values, dtype=float)
+    if isinstance(input_units, str) and isinstance(output_units, str):
+        return compile_conversion(input_units, output_units).apply(values)
+
+    n = values.shape[0] if values.ndim else 1
+    units = []
+    for given in (input_units, output_units):
+        arr = np.asarray(given, dtype=str)
+        if arr.ndim and arr.shape != (n,):
+            raise ValueError(f"Expected {n} units, got {arr.shape[0]}")
+        units.append(np.broadcast_to(arr, (n,)))
+    in_names, in_codes = np.unique(units[0], return_inverse=True)
+    out_names, out_codes = np.unique(units[1], return_inverse=True)
+    pairs, pair_codes = np.unique(in_codes * len(out_names) + out_codes, return_inverse=True)
+
+    factor = np.empty(len(pairs))
+    offset = np.empty(len(pairs))
+    for k, code in enumerate(pairs):
+        source, target = in_names[code // len(out_names)], out_names[code % len(out_names)]
+        try:
+            plan = compile_conversion(str(source), str(target))
+        except ValueError as e:
+            raise ValueError(f"{source} -> {target}: {e}")
+        factor[k], offset[k] = plan.factor, plan.offset
+    return values * factor[pair_codes] + offset[pair_codes]
+
+
 class GeneralConverter():
     def __init__(self, value, input_unit, output_unit):
-
         self.value = value
-        ratio = 1.0
-        
-        input_unit=input_unit.split(".")
-        output_unit=output_unit.split(".")
-
-        if len(input_unit) == 1 and len(output_unit) == 1:
-            simple_temperature=["degC","K","degF","R"]
-            if input_unit[0] in simple_temperature and output_unit[0] in simple_temperature:
-                self.converted_value = BaseConverter(self.value,input_unit[0],output_unit[0], select_key="temp",temp_control=False).Temperature()
-                return 
-
-        _input, param_input = self.simplify(input_unit)
-        _output, param_output = self.simplify(output_unit)
-        ratio = ratio * param_input / param_output
+        plan = compile_conversion(input_unit, output_unit)
+        self.ratio = plan.ratio
+        self.converted_value = plan.apply(value)
 
+    @staticmethod
+    def batch(values, input_units, output_units):
+        """Vectorized conversion; see convert_batch()."""
+        return convert_batch(values, input_units, output_units)
 
-        input_prefix = [] 
-        output_prefix = []
-        input_ = [] 
-        output_ = [] 
-        
-        prefix_ = ['Y','Z','E','P','T','G','M','k','h','da','d','c','mi','mc','n','p','f','a','z','yo']
-
-        for i in _input:
-            j = i
-            if "/" in i: j=i.replace("/","")
-            if j in prefix_:
-                input_prefix.append(i)
-            else:
-                input_.append(i)
-
-        for i in _output:
-            j = i
-            if "/" in i: j=i.replace("/","")
-            if j in prefix_:
-                output_prefix.append(i)
-            else:
-                output_.append(i)
-
-        input_, output_ = self.remove_redundants(input_, output_)
-        _input = self.logical_sort(input_)
-        _output = self.logical_sort(output_)
-
-        if len(_output) != len(_input):
-            print("Attempting to swap messy units")
-            if len(_input)>len(_output):
-                _input, _ratio = self.LastCall(_input)
-            else:
-                _output, _ratio = self.LastCall(_output)
-            _input, _output = self.remove_redundants(_input,_output)
-            if len(_output) != len(_input):
-                raise ValueError("Input and Output units are not equivalent")
-            ratio = ratio * _ratio
-            _input = self.logical_sort(_input)
-            _output = self.logical_sort(_output)
-        
-        if not self._assert(_input, _output):
-            raise ValueError("Input and Output units are not equivalent")
-        
-        for i,j in zip(_input, _output):
-            k=i; l=j; kk = False; ll = False
-            if "/" in i: k = i.replace("/",""); kk = True
-            if "/" in j: l = j.replace("/",""); ll = True
-            hold = BaseConverter(1,k,l)
-            if kk == True and ll == True:
-                param = 1 / hold.ratio
-            else:
-                param = hold.ratio
-            ratio = ratio * param
-        for i in input_prefix:
-            k=i; kk = False; 
-            if "/" in i: k = i.replace("/",""); kk = True
-            if kk == True:
-                ratio = ratio/self._handler(k)
-            else:
-                ratio = ratio*self._handler(k)
-        
-        for i in output_prefix:
-            k=i; kk = False; 
-            if "/" in i: k = i.replace("/",""); kk = True
-            if kk == True:
-                ratio = ratio*self._handler(k)
-            else:
-                ratio = ratio/self._handler(k)
-            
-
-        self.ratio = ratio
-        self.converted_value = self.value * ratio
-    
-    def simplify(self, list_to_simplify:list):
-        prefix = ['Y','Z','E','P','T','G','M','k','h','da','d','c','mi','mc','n','p','f','a','z','yo']
-        select = {"N":"kg.m./s./s", "Hz":"/s","Wb":"m.m.kg./s./s./A",
-                  "T":"kg./s./s./A", "W":"kg.m.m./s./s./s","Pa":"kg./m./s./s",
-                  "J":"m.m.k.g./s./s", "C":"A.s", "F":"A.A.s.s.s.s.m.m./kg",
-                  "S":"s.s.s.A.A./kg./m./m","Gy":"m.m./s./s","H":"m.m.kg./s./s./A./A",
-                  "V":"m.m.kg./s./s./s./A","Ohm":"m.m.kg./s./s./s./A./A",
-                  "lx":"cd.sr./m./m","lm":"cd.sr", "Bq":"/s",
-                  "bar":"a1.Pa", "atm":"a2.Pa","mH2O":"a3.Pa","ftH2O":"a4.psi",
-                   "mmHg":"a5.Pa", "inHg":"a6.psi",
-                   "psi":"lbi./in./s./s", "lbf":"a11.lb.ft./s./s","lbi":"a17.a11.lb","psf":"lbf./ft./ft",
-                   "gallon":"a7.in.in.in", "quart":"a8.in.in.in","pint":"a9.in.in.in","floz":"a10.in.in.in",
-                   "kip":"a12.lbf","L":"a13.m.m.m", "Liter":"a13.m.m.m",
-                   "tbsp":"a14.floz", "tsp":"a15.tbsp",
-                   "mph":"mile./hr", "kph":"km./hr",
-                   "MPa":"M.Pa", "kPa":"k.Pa", "GPa":"G.Pa", "kN":"k.N","kJ":"k.J",
-                   "mm":"mi.m","cm":"c.m","km":"k.m","kg":"k.g",
-                   "BTU":"e1.J","IT":"e2.J", "BTUc":"e3.J", "BTUt":"e4.J", "BTUcal":"e5.J",
-                   "hp":"e6.W", "ccf":"M.J", "cal":"c1.J", "calt":"c2.J", "cal4":"c3.J", "cal15":"c4.J", "cal20":"c5.J"
-                    , "calmean":"c6.J", "calit":"c7.J", "toneTNT":"e6.G.J", "TNT":"e6.G.J./ton", "eV":"e7.J"}
-        conv = {"a1":1.0e5, "a2":101325,"a3":9806.4,"a4":0.4335,"a5":133.32,"a6":0.4911,
-                "a16":277.42, "a7":69.355,"a8":34.677,"a9":8.6694,"a10":1.7339,"a11":32.174049,
-                "a12":1000,"a13":0.001, "a14":0.5, "a15":1/3, "a17":12,
-                "e1":1054.8, "e2":1055.06,"e3":1054.68,"e4":1054.35,"e5":1059.67,"e6":4.184,"e7":1.602176634e-19,
-                "c1":4.1868, "c2":4.184, "c3":4.204, "c4":4.1855, "c5":4.182, "c6":4.190, "c7":4.1868}
-        
-        increments = []
-        for i in list_to_simplify:
-            if "**" in i:
-                j = i.split("**")
-                if int(j[1]) > 10: raise ValueError("Exponents are too large. Stopping here for security.")
-                for k in range(int(j[1])):
-                    increments.append(j[0])
-                list_to_simplify.pop(list_to_simplify.index(i))
-        list_to_simplify = list_to_simplify + increments
-        
-        check = 0
-        while check < 5:
-            hold_list = [] 
-            
-            for i in list_to_simplify:
-                j = i
-                hold = False
-                if "/" in i: 
-                    j = i.replace("/","")
-                    hold = True
-                if j in select:
-                    if hold == True:
-                        var = select[j]
-                        var = var.replace(".", "./")
-                        hold_list.append("/"+var)
-                    else:
-                        hold_list.append(select[j])
-                else:
-                    hold_list.append(i)
-            
-            for i in hold_list:
-                var = i.split(".")
-                hold_list.pop(hold_list.index(i))
-                for j in var:
-                    hold_list.append(j)
-            list_to_simplify = hold_list
-            check += 1
-            
-        hold_list = []
-        param = 1
-        for i in list_to_simplify:              
-            j = i
-            inverse = False
-            if "/" in i: 
-                j = i.replace("/","")
-                inverse = True
-            if j in conv and inverse==False:
-                param = param*conv[j]
-            elif j in conv and inverse==True:
-                param = param/conv[j]
-            else:
-                hold_list.append(i)
-
-        list_to_simplify=hold_list
-
-        return list_to_simplify, float(param)
-
-    def _handler(self,prefix:str):
-        prefix_list = {'Y':1.0e24,'Z':1.0e21,'E':1.0e18,'P':1.0e15,'T':1.0e12,'G':1.0e9,'M':1.0e6,'k':1.0e3,'h':1.0e2,'da':1.0e1,
-                       'd':1.0e-1,'c':1.0e-2,'mi':1.0e-3,'mc':1.0e-6,'n':1.0e-9,'p':1.0e-12,'f':1.0e-15,'a':1.0e-18,'z':1.0e-21,'yo':1.0e-24,
-                       'Holdkgf':9.80665,'Holdozf':0.0625,'Holdcal':4.184,'Holdcal15':4.1855,'Holdcal20':4.182,'HoldBTU':1054.35,'Holderg':1e-7,'Holdhp':735.49875, 
-                       'Holdbhp':745.69987,'Holdehp':746,'Holdshp':9812.5,'Holdacre':4046.87261, 'Holdbarn':1e-28, 'Holdha':1e4}
-        param=prefix_list[prefix]
-        return param
-
-    def _assert(self,input, output) -> bool:
-        return True
-    
-    def remove_redundants(self,in_list:list, out_list:list):
-        in_hold = []; out_hold = []
-
-        for i in in_list:
-            if "/" in i:
-                j = i.replace("/","")
-                if j in in_list:
-                    in_hold.append(i)
-                    in_hold.append(j)
-                    in_list.pop(in_list.index(i))
-                    in_list.pop(in_list.index(j))
-        for i in out_list:
-            if "/" in i:
-                j = i.replace("/","")
-                if j in out_list:
-                    out_hold.append(i)
-                    out_hold.append(j)
-                    out_list.pop(out_list.index(i))
-                    out_list.pop(out_list.index(j))  
-
-        if len(in_list) == len(out_list):            
-            return in_list, out_list
-        elif len(in_list) > len(out_list):
-            diff = abs(len(in_list) - len(out_list))
-            if diff%2:  raise ValueError("Input and Output units are not equivalent")
-            c = 0
-            while c < diff:
-                try:
-                    out_list.append(out_hold[c])
-                    c += 1 
-                except:
-                    c += 1           
-            return in_list, out_list
-        elif len(in_list) < len(out_list):
-            diff = abs(len(in_list) - len(out_list))
-            if diff%2:  raise ValueError("Input and Output units are not equivalent")
-            c = 0
-            while c < diff:                
-                try:
-                    in_list.append(in_hold[c])
-                    c += 1 
-                except:
-                    c += 1 
-            return in_list, out_list
-        raise ValueError("Input and Output units are not equivalent")
-
-    def logical_sort(self,list_to_sort:list) -> list:
-        list_lenght = [];list_mass=[]; list_time = []; list_temp = [] ;list_charge = []; list_chem = [] 
-        l = ["m","in","ft","yd","mile","nmile"]
-        m = ["g","slug","stone","tone","lb","oz","ton","ukton"]
-        t = ['s',"min","hr","day","week","month","year"] 
-        temp = ["degC", 'degF','K',"R"] 
-        c = ["A","el"] 
-        chem = ["not coded"] 
-        for i in list_to_sort:
-            j = i
-            if "/" in i: j = i.replace("/","")
-            
-            if j in l: list_lenght.append(i)
-            if j in m: list_mass.append(i)
-            if j in t: list_time.append(i)
-            if j in temp: list_temp.append(i)
-            if j in c: list_charge.append(i)
-            if j in chem: list_chem.append(i)
-
-        list_ = []
-        list_lenght.sort()
-        list_mass.sort()
-        list_temp.sort()
-        list_time.sort()
-        list_charge.sort()
-        list_chem.sort()
-        if len(list_lenght) > 0: 
-            for i in list_lenght: 
-                list_.append(i)
-        if len(list_mass) > 0: 
-            for i in list_mass: 
-                list_.append(i)
-        if len(list_time) > 0: 
-            for i in list_time: 
-                list_.append(i)
-        if len(list_temp) > 0: 
-            for i in list_temp: 
-                list_.append(i)
-        if len(list_charge) > 0: 
-            for i in list_charge: 
-                list_.append(i)
-        if len(list_chem) > 0: 
-            for i in list_chem: 
-                list_.append(i)
-
-        return list_
-
-    def LastCall(self, _input:list):
-        ratio = 1
-        for i in _input:
-            if "/" in i:
-                tp = self.get_type(i.replace("/", ""))
-                print(f"testing {i}")
-                for j in _input:
-                    if "/" not in j:
-                        print(f"testing match {j}")
-                        op = self.get_type(j)
-                        if not i.replace("/","") == j:
-                            if op == tp:
-                                print(f"found {i} and {j}")
-                                print("Swaping variables")
-                                ratio = ratio * BaseConverter(1, i.replace("/", ""), j).ratio
-                                _input.pop(_input.index(j))
-                                _input.append(i.replace("/", ""))
-                                print("Success! ")
-                                return _input, ratio
-        print("Failed to find swaps, redirecting and shutting down")
-        return _input, ratio
-    
-    def get_type(self, var):
-        l = ["m","in","ft","yd","mile","nmile"]
-        m = ["g","slug","stone","tone","lb","oz","ton","ukton"]
-        t = ['s',"min","hr","day","week","month","year"] 
-        temp = ["degC", 'degF','K',"R"] 
-        c = ["A","el"] 
-        chem = [] 
-        if var in l: return "lenght"
-        if var in m: return "mass"
-        if var in t: return "time"
-        if var in temp: return "temp"
-        if var in c: return "charge"
-        if var in chem: return "chem"
-    
 class NumberType:
     def __init__(self, Value, outform = "sci" ):
         self.Value = Value
@@ -344,150 +292,20 @@ class BaseConverter:
         self.in_var = in_unit
         self.out_var = out_unit
         self.temp_control = temp_control
-        select={"lenght":0, "mass":1, "time":2, "temp":3, "charge":4, "chem":5,"temp_variance":6}
-        if select_key == "none":
-            select_key = self.get_type()
-        compute_key = select[select_key]
-        if compute_key == 0:
-            self.converted_value = self.Lenght()
-        elif compute_key == 1: 
-            self.converted_value = self.Mass()
-        elif compute_key == 2:
-            self.converted_value = self.Time()
-        elif compute_key == 3:
-            self.converted_value = self.Temperature()
-        elif compute_key == 4:
-            self.converted_value = self.Charge()
-        elif compute_key == 5:
-            self.converted_value = self.Chemestry()
-        elif compute_key == 6:
-            self.converted_value = self.Temperature_variance()
-
-    def Mass(self):
-        select={"g":0,"slug":1,"stone":2,"tone":3,"lb":4,"oz":5,"ton":6,"ukton":7}
-        ratio_table=[[1,6.8522e-5,0.000157473,1e-6,0.00220462,0.035274,1.1023e-6,9.8421e-7],
-                     [14593.9,1,2.29815,0.01459639,32.174,514.785,0.016087,0.0143634,],
-                     [6350.29,0.435133,1,0.00635029,0.0625,224,0.007,2.7902e-5,],
-                     [1e6,68.5218,157.473,1,2204.62,35274,1.10231,0.984207,],
-                     [453.592,0.031081,0.0714286,0.000453592,1,16,0.0005,0.000446429],
-                     [28.3495,0.00194256,0.00446429,2.835e-5,0.0625,1,3.125e-5,2.7902e-5],
-                     [907185,62.1619,142.857,0.907185,2000,32000,1,0.892857],
-                     [1.016e6,69.6213,160,1.01605,2240,35840,1.12,1]]
-        i = select[self.in_var]
-        j = select[self.out_var]
-        self.ratio = ratio_table[i][j]
-        return self.in_value * ratio_table[i][j]
-
-    def Lenght(self):
-        select={"m":0,"in":1,"ft":2,"yd":3,"mile":4,"nmile":5}
-        ratio_table = [[1,       39.3701, 3.28084,  1.09361,   0.000621371,  0.000539957],
-                       [0.0254,  1,       0.083333, 0.0277778, 1.5783e-5,   1.3715e-5],
-                       [0.3048,  12,      1,        1/3,       0.0018934,   0.000164579],
-                       [0.9144,  36,      3,        1,         0.000568182, 0.000493737],
-                       [1609.34, 63360,   5280,     1760,      1,           0.868976],
-                       [1852,    72913.4, 6076.12,  1.15078,   2025.37,     1]]
-        i=select[self.in_var]
-        j=select[self.out_var]
-        self.ratio = ratio_table[i][j]
-        return self.in_value * ratio_table[i][j]
-
-    def Time(self):        
-        select = {'s': 0,"min": 1,"hr": 2,"day": 3,"week": 4,"month": 5,"year": 6}        
-        ratio_table = [
-            [1, 1/60, 1/60/60, 1/60/60/24, 1/60/60/24/7 ,1/60/60/24/30, 1/3.171e-8],
-            [60, 1, 1/60, 1/60/24, 1/60/24/7, 1/60/24/30, 1/525600],
-            [60*60, 60, 1, 1/24, 1/24/7, 1/24/30, 1/8760],
-            [60 * 60 * 24, 60 * 24, 24, 1, 1/7, 1/30, 1/365],
-            [60*60*24*7,60*24*7,24*7,7,1,1/4,1/52],
-            [60*60*24*30, 60*24*30, 24*30, 30, 4, 1, 1/12],
-            [60*60*24*365, 60*24*365, 24*365, 365, 52, 12, 1],
-            ]
-        i = select[self.in_var]
-        j = select[self.out_var] 
-        self.ratio = ratio_table[i][j]      
-        return self.in_value * ratio_table[i][j]
+        if in_unit not in UNITS or out_unit not in UNITS:
+            raise ValueError(f"Unknown unit '{in_unit if in_unit not in UNITS else out_unit}'")
+        # temp_control=False (or select_key="temp") converts absolute temperatures
+        absolute = select_key == "temp" or not temp_control
+        if absolute and in_unit in TEMPERATURE_SCALES:
+            plan = compile_conversion(in_unit, out_unit)
+        else:
+            # Single units only: temperatures as intervals
+            plan = compile_conversion(in_unit + ".", out_unit + ".")
+        self.ratio = plan.ratio
+        self.converted_value = plan.apply(value)
 
     def Temperature(self):
-        if(self.in_var == "degC"):
-            if(self.out_var == "K"):
-                temp = self.in_value + 273.15
-            elif(self.out_var == "degF"):
-                temp = self.in_value * (9 / 5) + 32
-            elif(self.out_var == 'R'):
-                temp = (self.in_value * 9 / 5 + 32) - 459.67
-            else: raise ValueError("temperature output not listed")
-        
-        elif(self.in_var == "K"):
-            if(self.out_var == "degC"):
-                temp = self.in_value - 273.15
-            elif(self.out_var == "degF"):
-                temp = (self.in_value - 273.15) * 9 / 5 + 32
-            elif(self.out_var == 'R'):
-                temp = (self.in_value * 9 / 5)
-            else: raise ValueError("temperature output not listed")
-        
-        elif(self.in_var == "degF"):
-            if(self.out_var == "degC"):
-                temp = (self.in_value - 32) * 5  / 9
-            elif(self.out_var == "K"):
-                temp = (self.in_value - 32) * 5  / 9 + 273.15
-            elif(self.out_var == 'R'):
-                temp = (self.in_value - 459.67)
-            else: raise ValueError("temperature output not listed")
-
-        elif(self.in_var == "R"):
-            if(self.out_var == "degC"):
-                temp = (self.value * 5 / 9 ) + 273.15
-            elif(self.out_var == 'degF'):
-                temp = self.in_value + 459.67
-            elif(self.out_var == 'K'):
-                temp = self.in_value * 5 / 9
-            else:
-                raise ValueError("temperature output not listed")
-
-        else: raise ValueError("temperature input unit not listed")
-        
-        return temp
-
-    def Temperature_variance(self):
-        select={"degC":0,"K":1,"degF":2,"R":3}
-        ratio_table=[[1,     1, 1.8, 1.8],
-                     [1,     1, 1.8, 1.8],
-                     [0.5556, 0.5556, 1,   1],
-                     [0.5556, 0.556, 1,   1]]
-        i=select[self.in_var]
-        j=select[self.out_var]
-        self.ratio = ratio_table[i][j]
-        return self.in_value * ratio_table[i][j]
-
-    def Charge(self):
-        select={"A":0, "el":1}
-        ratio_table=[[1,6.241e18],[1/6.241e18,1]]
-        i=select[self.in_var]
-        j=select[self.out_var]
-        self.ratio = ratio_table[i][j]
-        return self.in_value * ratio_table[i][j]
-
-    def Chemestry(self):
-        pass
-
-    def get_type(self):
-        l = ["m","in","ft","yd","mile","nmile"]
-        m = ["g","slug","stone","tone","lb","oz","ton","ukton"]
-        t = ['s',"min","hr","day","week","month","year"] 
-        temp = ["degC", 'degF','K',"R"] 
-        c = ["A","el"] 
-        chem = [] 
-        if self.in_var in l: return "lenght"
-        if self.in_var in m: return "mass"
-        if self.in_var in t: return "time"
-        if self.in_var in temp: 
-            if self.temp_control == False:
-                return "temp"
-            else: 
-                return "temp_variance"
-        if self.in_var in c: return "charge"
-        if self.in_var in chem: return "chem"
+        return compile_conversion(self.in_var, self.out_var).apply(self.in_value)
 
 class material: 
     def __init__(self, K = -1, E = -1, lame = -1, G = -1, Poisson = -1):
@@ -1,13 +1,52 @@
 import math
+import os
+import sqlite3
 import datetime as dt
 import time
 import numpy as np
-import yfinance as yf
+
+from backend.market_data import get_provider, period_window
+from backend.price_store import get_price_store
+
+
+# Minimum seconds between upstream top-ups of the same ticker
+HISTORY_REFRESH_SECONDS = int(os.getenv('PRICE_STORE_REFRESH', '300'))
+# Relative move of an already-final bar that signals a re-adjusted series
+ADJUSTMENT_TOLERANCE = 0.005
+
+def _refresh_history(store, stock):
+    """Top up the local store with the bars after the last stored one."""
+    checked_at = store.checked_at(stock)
+    if checked_at is not None and time.time() - checked_at < HISTORY_REFRESH_SECONDS:
+        return
+
+    recent = store.last_dates(stock, 2)
+    if not recent:
+        labels, prices = get_provider().history(stock, period="max")
+        store.upsert(stock, labels, prices)
+        return
+
+    # Re-request from the previous (final) bar: it detects upstream
+    # re-adjustments and refreshes the still-forming latest bar.
+    anchor = recent[-1]
+    labels, prices = get_provider().history(stock, start=anchor)
+    if labels and labels[0] == anchor:
+        stored = store.close_on(stock, anchor)
+        if stored and abs(prices[0] - stored) > ADJUSTMENT_TOLERANCE * stored:
+            print(f"Info: adjusted history changed for {stock}, rebuilding local store")
+            labels, prices = get_provider().history(stock, period="max")
+            store.upsert(stock, labels, prices, replace=True)
+            return
+    store.upsert(stock, labels, prices)
 
 
 def get_stock_data(stock, period="max", start=None, end=None):
     """
     Get stock price data for a given ticker symbol.
+
+    Closes are served from the local price history store, which is topped up
+    from the market data provider with only the bars missing since the last
+    refresh.
     
     Args:
         stock (str): Stock ticker symbol
@@ -19,24 +58,34 @@ def get_stock_data(stock, period="max", start=None, end=None):
         tuple: (labels, prices) - lists of dates and closing prices
     """
     try:
-        if start is not None and end is not None: 
-            df = yf.download(stock, start=start, end=end, auto_adjust=True, progress=False)
+        try:
+            store = get_price_store()
+            try:
+                _refresh_history(store, stock)
+            except sqlite3.Error:
+                raise
+            except Exception as e:
+                print(f"Warning: could not refresh {stock} ({e}), serving stored history")
+        except sqlite3.Error as e:
+            print(f"Warning: price store unavailable ({e}), downloading {stock} directly")
+            if start is not None and end is not None:
+                labels, prices = get_provider().history(stock, start=start, end=end)
+            else:
+                labels, prices = get_provider().history(stock, period=period)
         else:
-            df = yf.download(stock, period=period, auto_adjust=True, progress=False)
-        
-        if df.empty:
+            if start is not None and end is not None:
+                labels, prices = store.read(stock, start=start, end=end)
+            else:
+                period_start, bar_count = period_window(period)
+                if bar_count is not None:
+                    labels, prices = store.tail(stock, bar_count)
+                else:
+                    labels, prices = store.read(stock, start=period_start)
+
+        if not labels:
             print(f"Warning: No data found for ticker {stock}")
             return [], []
         
-        # Build labels and prices safely (pandas Series of floats)
-        df["Date"] = df.index.strftime('%Y-%m-%d')
-        df["CloseP"] = df.Close
-        labels = df["Date"].tolist()
-        print("here")
-        print(df["Close"])
-        # Format prices to 2 decimal places
-        prices = [round(float(price), 2) for price in df["CloseP"].astype(float).tolist()]
-        
         return labels, prices
     
     except Exception as e:
@@ -54,13 +103,7 @@ def get_stock_info(stock):
         list: Company information [name, industry, sector, 52w_low, 52w_high, dividend_yield, description]
     """
     try:
-        ticker = yf.Ticker(stock)
-        info = {}
-        # Prefer get_info() on newer yfinance, fallback to .info
-        try:
-            info = ticker.get_info()
-        except Exception:
-            info = getattr(ticker, 'info', {}) or {}
+        info = get_provider().info(stock)
         
         if not info:
             print(f"Warning: No information found for ticker {stock}")
@@ -104,17 +147,88 @@ def get_current_price(stock):
         float: Current stock price
     """
     try:
-        ticker = yf.Ticker(stock)
-        # Get only last 2 days of data to ensure we have recent data
-        data = ticker.history(period='2d', auto_adjust=True)
-        
-        if data.empty:
+        price = get_provider().quotes([stock]).get(stock)
+        if price is None:
             print(f"Warning: No price data found for ticker {stock}")
             return 0.0
         
         # Format current price to 2 decimal places
-        return round(float(data["Close"].iloc[-1]), 2)
+        return round(float(price), 2)
     
     except Exception as e:
         print(f"Error fetching current price for {stock}: {e}")
         return 0.0
+
+
+def get_current_prices(tickers):
+    """
+    Get the current/latest prices for several ticker symbols in one request.
+    
+    Args:
+        tickers (list): Stock ticker symbols
+    
+    Returns:
+        dict: ticker -> current stock price (0.0 when no data was found)
+    """
+    tickers = list(dict.fromkeys(tickers))
+    prices = {t: 0.0 for t in tickers}
+    if not tickers:
+        return prices
+    try:
+        quotes = get_provider().quotes(tickers)
+        for t in tickers:
+            if t not in quotes:
+                print(f"Warning: No price data found for ticker {t}")
+                continue
+            # Format current price to 2 decimal places
+            prices[t] = round(float(quotes[t]), 2)
+        return prices
+    
+    except Exception as e:
+        print(f"Error fetching current prices for {', '.join(tickers)}: {e}")
+        return prices
+
+
+def downsample_lttb(labels, prices, max_points):
+    """
+    Downsample a price series with Largest-Triangle-Three-Buckets.
+    
+    The first and last points are kept; every bucket in between contributes the
+    point forming the largest triangle with the previously kept point and the
+    next bucket's average, which preserves visually important extremes.
+    
+    Args:
+        labels (list): Dates of the series
+        prices (list): Prices of the series
+        max_points (int): Number of points to keep (at least 3)
+    
+    Returns:
+        tuple: (labels, prices) - downsampled lists
+    """
+    n = len(prices)
+    if max_points >= n or max_points < 3:
+        return list(labels), list(prices)
+
+    y = np.asarray(prices, dtype=float)
+    x = np.arange(n, dtype=float)
+    # Bucket boundaries for the n - 2 interior points
+    edges = np.floor(np.linspace(1, n - 1, max_points - 1)).astype(int)
+    # Average of every bucket, used as the third triangle vertex
+    sums = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_y = np.append(sums / counts, y[-1])
+    avg_x = np.append((edges[:-1] + edges[1:] - 1) / 2.0, x[-1])
+
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        cx, cy = avg_x[i + 1], avg_y[i + 1]
+        ax, ay = x[a], y[a]
+        # Twice the triangle area for every candidate in the bucket at once
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return [labels[i] for i in selected], y[selected].tolist()
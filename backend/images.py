@@ -0,0 +1,255 @@
+"""
+Resized, re-encoded image derivatives for /api/images.
+
+Requested widths snap to a fixed ladder so the number of variants per image
+stays bounded. Derivatives are content-addressed (hash of the source content
+plus the encoding parameters) and stored under instance/image-cache, capped
+in total size with least-recently-used eviction. Encoding runs in a process
+pool so request threads never do Pillow work, and callers wait at most a
+short timeout: a cold derivative is submitted, the caller serves the original,
+and the finished file is recorded by a done-callback for later requests.
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps, ImageSequence, features
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, 'instance', 'image-cache')
+ALLOWED_WIDTHS = (160, 320, 480, 640, 960, 1280, 1920)
+SOURCE_TYPES = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+QUALITY_RANGE = (30, 95)
+DEFAULT_QUALITY = 80
+MAX_ANIMATION_FRAMES = 300
+
+FORMATS = {
+    # name -> (Pillow format, file extension, MIME type)
+    'webp': ('WEBP', 'webp', 'image/webp'),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg'),
+}
+if features.check('avif'):
+    FORMATS['avif'] = ('AVIF', 'avif', 'image/avif')
+
+
+def snap_width(width):
+    """Smallest allowed width >= width (the largest one past the end)."""
+    for allowed in ALLOWED_WIDTHS:
+        if width <= allowed:
+            return allowed
+    return ALLOWED_WIDTHS[-1]
+
+
+def negotiate_format(accept_mimetypes):
+    """Best output format the client accepts: AVIF, then WebP, then JPEG."""
+    for name in ('avif', 'webp'):
+        if name in FORMATS and FORMATS[name][2] in accept_mimetypes.values():
+            return name
+    return 'jpeg'
+
+
+def encode_derivative(source, target, width, fmt, quality):
+    """Write a resized copy of source to target (runs in a pool process).
+
+    Never upscales. Animated sources stay animated for WebP/AVIF; JPEG gets
+    the first frame.
+
+    Returns:
+        int: Size of the written file in bytes.
+    """
+    pil_format = FORMATS[fmt][0]
+    with Image.open(source) as img:
+        scale = min(1.0, width / img.width)
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        animated = getattr(img, 'is_animated', False) and fmt != 'jpeg'
+        frames = ImageSequence.Iterator(img) if animated else [ImageOps.exif_transpose(img)]
+        out = []
+        for i, frame in enumerate(frames):
+            if i >= MAX_ANIMATION_FRAMES:
+                break
+            frame = frame.convert('RGBA' if fmt != 'jpeg' else 'RGB')
+            out.append(frame.resize(size, Image.LANCZOS) if scale < 1.0 else frame)
+        options = {'quality': quality}
+        if pil_format == 'JPEG':
+            options.update(optimize=True, progressive=True)
+        elif pil_format == 'WEBP':
+            options['method'] = 4
+        if len(out) > 1:
+            options.update(save_all=True, append_images=out[1:], loop=img.info.get('loop', 0),
+                           duration=img.info.get('duration', 100))
+        tmp = f"{target}.{os.getpid()}.tmp"
+        try:
+            out[0].save(tmp, pil_format, **options)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+    # Atomic publish: concurrent writers of the same key produce identical files
+    os.replace(tmp, target)
+    return os.path.getsize(target)
+
+
+class DerivativeCache:
+    """Size-capped, content-addressed directory of encoded images.
+
+    Args:
+        directory (str): Cache directory (created if missing).
+        max_bytes (int): Total size cap; oldest-used files go first.
+        workers (int): Encoder processes.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=512 * 1024 * 1024, workers=2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.workers = workers
+        os.makedirs(directory, exist_ok=True)
+        self._pool = None
+        self._pool_pid = None
+        self._pending = {}  # key -> Future, so identical requests share one encode
+        # Reentrant: a future that is already done runs its callback inline
+        self._lock = threading.RLock()
+        self._bytes = sum(size for _, _, size in self._entries())
+        self.counters = {'hits': 0, 'encodes': 0, 'timeouts': 0, 'errors': 0, 'evictions': 0,
+                         'pool_restarts': 0}
+
+    @staticmethod
+    def key(fingerprint, width, fmt, quality):
+        """Content address of a derivative."""
+        return hashlib.sha256(f"{fingerprint}|{width}|{fmt}|{quality}".encode()).hexdigest()
+
+    def path_for(self, key, fmt):
+        return os.path.join(self.directory, key[:2], f"{key}.{FORMATS[fmt][1]}")
+
+    def _executor(self):
+        # A pool must not be shared across fork; each worker starts its own
+        if self._pool_pid != os.getpid():
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def _replace_pool(self, broken):
+        """Swap in a fresh pool after an encoder process died (once per broken pool)."""
+        with self._lock:
+            if self._pool is broken:
+                print("Warning: image encoder pool broke; starting a new one")
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self.counters['pool_restarts'] += 1
+        broken.shutdown(wait=False)
+
+    def _submit(self, key, source, target, width, fmt, quality):
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                pool = self._executor()
+                try:
+                    future = pool.submit(encode_derivative, source, target, width, fmt, quality)
+                except BrokenProcessPool:
+                    self._replace_pool(pool)
+                    pool = self._pool
+                    future = pool.submit(encode_derivative, source, target, width, fmt, quality)
+                future.pool = pool  # which pool to replace if this one breaks
+                self._pending[key] = future
+                future.add_done_callback(lambda f, key=key: self._finished(key, f))
+        return future
+
+    def _entries(self):
+        for dirpath, _, filenames in os.walk(self.directory):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_mtime, st.st_size
+
+    def get(self, source, fingerprint, width, fmt, quality, timeout):
+        """Path of the derivative, encoding it first if needed.
+
+        Args:
+            source (str): Original image file.
+            fingerprint (str): Content hash (or other version tag) of source.
+            width (int): Snapped target width.
+            fmt (str): Key of FORMATS.
+            quality (int): Encoder quality.
+            timeout (float): Seconds to wait for an encode (0 returns at once);
+                keep it short, the caller's thread is blocked meanwhile.
+
+        Returns:
+            str or None: Derivative path, or None if it is not ready in time
+            or failed (serve the original then).
+        """
+        key = self.key(fingerprint, width, fmt, quality)
+        target = self.path_for(key, fmt)
+        try:
+            # mtime is the LRU clock (atime is unreliable on noatime mounts)
+            os.utime(target)
+            self.counters['hits'] += 1
+            return target
+        except FileNotFoundError:
+            pass
+
+        future = self._submit(key, source, target, width, fmt, quality)
+        try:
+            try:
+                future.result(timeout=timeout)
+            except BrokenProcessPool:
+                # An encoder process died (e.g. OOM-killed); retry once on a new pool
+                self._replace_pool(future.pool)
+                with self._lock:
+                    if self._pending.get(key) is future:
+                        del self._pending[key]
+                future = self._submit(key, source, target, width, fmt, quality)
+                future.result(timeout=timeout)
+        except FutureTimeout:
+            self.counters['timeouts'] += 1
+            return None
+        except Exception as e:
+            print(f"Warning: could not encode {source} ({width}px {fmt}): {e}")
+            return None
+        return target
+
+    def _finished(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+            if future.cancelled() or future.exception() is not None:
+                self.counters['errors'] += 1
+                return
+            self.counters['encodes'] += 1
+            self._bytes += future.result()
+            over = self._bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used files until the cache is 90% of its cap."""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda e: e[1])
+            total = sum(size for _, _, size in entries)
+            for path, _, size in entries:
+                if total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                self.counters['evictions'] += 1
+            # Other workers write to the same directory; resync with the disk
+            self._bytes = total
+
+    def stats(self):
+        return {**self.counters, 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                'pending': len(self._pending), 'formats': sorted(FORMATS)}
+
+
+def cache_from_env():
+    """DerivativeCache configured from IMAGE_CACHE_* environment variables."""
+    return DerivativeCache(
+        directory=os.getenv('IMAGE_CACHE_DIR', DEFAULT_CACHE_DIR),
+        max_bytes=int(os.getenv('IMAGE_CACHE_MAX_BYTES', str(512 * 1024 * 1024))),
+        workers=int(os.getenv('IMAGE_WORKERS', '2')),
+    )
@@ -0,0 +1,181 @@
+"""
+Vectorized technical indicators over a daily close series.
+
+All indicators are computed with NumPy array operations: rolling windows use
+shared cumulative sums, and exponential averages use a blockwise closed form
+instead of a per-bar Python loop. Warm-up values that are not yet defined are
+returned as None so results serialize straight to JSON.
+"""
+import math
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+# Indicator type -> default parameters (also the accepted parameter names)
+DEFAULTS = {
+    'sma': {'window': 20},
+    'ema': {'window': 20},
+    'rsi': {'window': 14},
+    'macd': {'fast': 12, 'slow': 26, 'signal': 9},
+    'bollinger': {'window': 20, 'k': 2.0},
+    'volatility': {'window': 20},
+}
+DEFAULT_SPEC = (
+    ('sma', (('window', 20),)),
+    ('sma', (('window', 50),)),
+    ('ema', (('window', 20),)),
+    ('rsi', (('window', 14),)),
+    ('macd', (('fast', 12), ('signal', 9), ('slow', 26))),
+    ('bollinger', (('k', 2.0), ('window', 20))),
+    ('volatility', (('window', 20),)),
+)
+MAX_WINDOW = 1000
+
+
+def normalize_spec(indicators):
+    """Validate a list of {'type': ..., **params} dicts into a hashable spec.
+
+    Raises:
+        ValueError: On an unknown indicator type, parameter or invalid value.
+    """
+    if not indicators:
+        return DEFAULT_SPEC
+    spec = []
+    for item in indicators:
+        if isinstance(item, str):
+            item = {'type': item}
+        kind = str(item.get('type', '')).lower()
+        if kind not in DEFAULTS:
+            raise ValueError(f"Unknown indicator {kind!r}")
+        params = dict(DEFAULTS[kind])
+        for name, value in item.items():
+            if name == 'type':
+                continue
+            if name not in params:
+                raise ValueError(f"Unknown parameter {name!r} for {kind}")
+            params[name] = float(value) if name == 'k' else int(value)
+        for name, value in params.items():
+            if name != 'k' and not 1 <= value <= MAX_WINDOW:
+                raise ValueError(f"{kind} {name} must be between 1 and {MAX_WINDOW}")
+        spec.append((kind, tuple(sorted(params.items()))))
+    # Order-independent and duplicate-free so equal requests share a memo entry
+    return tuple(sorted(set(spec)))
+
+
+def _rolling_mean(csum, window, n):
+    out = np.full(n, np.nan)
+    if window <= n:
+        out[window - 1:] = (csum[window:] - csum[:-window]) / window
+    return out
+
+
+def _ewm(x, alpha, start=0):
+    """Exponential moving average seeded with x[start]; NaN before start.
+
+    ema[k] = w**k * (ema[0] + alpha * sum_j x[j] * w**-j) with w = 1 - alpha,
+    evaluated in blocks short enough that w**-j stays finite.
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    if start >= n:
+        return out
+    w = 1.0 - alpha
+    block = n if w >= 1.0 or w <= 0.0 else max(1, int(100 * math.log(10) / -math.log(w)))
+    prev = x[start]
+    out[start] = prev
+    i = start + 1
+    while i < n:
+        seg = x[i:i + block]
+        powers = w ** np.arange(1, len(seg) + 1)
+        out[i:i + len(seg)] = powers * (prev + alpha * np.cumsum(seg / powers))
+        prev = out[i + len(seg) - 1]
+        i += len(seg)
+    return out
+
+
+def _to_list(values, digits=4):
+    # NaN is the only value not equal to itself
+    return [v if v == v else None for v in np.round(values, digits).tolist()]
+
+
+def compute_indicators(prices, spec=DEFAULT_SPEC):
+    """Compute every indicator in spec over prices.
+
+    Args:
+        prices (list): Daily closes, oldest first.
+        spec (tuple): Output of normalize_spec().
+
+    Returns:
+        dict: Indicator name (e.g. 'sma_20', 'macd_12_26_9') -> list, or a
+        dict of lists for multi-line indicators (MACD, Bollinger bands).
+    """
+    x = np.asarray(prices, dtype=float)
+    n = len(x)
+    # Shared intermediates, computed once for the whole spec
+    csum = np.concatenate(([0.0], np.cumsum(x)))
+    csum_sq = np.concatenate(([0.0], np.cumsum(x * x)))
+    diff = np.diff(x, prepend=np.nan)
+    log_ret = np.log(x[1:] / x[:-1]) if n > 1 else np.empty(0)
+
+    result = {}
+    for kind, params in spec:
+        p = dict(params)
+        if kind == 'sma':
+            result[f"sma_{p['window']}"] = _to_list(_rolling_mean(csum, p['window'], n))
+
+        elif kind == 'ema':
+            result[f"ema_{p['window']}"] = _to_list(_ewm(x, 2.0 / (p['window'] + 1)))
+
+        elif kind == 'rsi':
+            window = p['window']
+            rsi = np.full(n, np.nan)
+            if n > window:
+                gains = np.clip(diff, 0, None)
+                losses = np.clip(-diff, 0, None)
+                # Wilder smoothing seeded with the simple average of the first window
+                gains[window] = gains[1:window + 1].mean()
+                losses[window] = losses[1:window + 1].mean()
+                avg_gain = _ewm(gains, 1.0 / window, start=window)
+                avg_loss = _ewm(losses, 1.0 / window, start=window)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+                rsi[(avg_loss == 0) & ~np.isnan(avg_gain)] = 100.0
+            result[f"rsi_{window}"] = _to_list(rsi, 2)
+
+        elif kind == 'macd':
+            fast = _ewm(x, 2.0 / (p['fast'] + 1))
+            slow = _ewm(x, 2.0 / (p['slow'] + 1))
+            macd = fast - slow
+            signal = _ewm(macd, 2.0 / (p['signal'] + 1)) if n else macd
+            result[f"macd_{p['fast']}_{p['slow']}_{p['signal']}"] = {
+                'macd': _to_list(macd),
+                'signal': _to_list(signal),
+                'histogram': _to_list(macd - signal),
+            }
+
+        elif kind == 'bollinger':
+            window, k = p['window'], p['k']
+            mean = _rolling_mean(csum, window, n)
+            mean_sq = _rolling_mean(csum_sq, window, n)
+            std = np.sqrt(np.clip(mean_sq - mean * mean, 0, None))
+            result[f"bollinger_{window}_{k:g}"] = {
+                'middle': _to_list(mean),
+                'upper': _to_list(mean + k * std),
+                'lower': _to_list(mean - k * std),
+            }
+
+        elif kind == 'volatility':
+            window = p['window']
+            vol = np.full(n, np.nan)
+            if window >= 2 and n > window:
+                r_csum = np.concatenate(([0.0], np.cumsum(log_ret)))
+                r_csum_sq = np.concatenate(([0.0], np.cumsum(log_ret * log_ret)))
+                s = r_csum[window:] - r_csum[:-window]
+                s2 = r_csum_sq[window:] - r_csum_sq[:-window]
+                # Sample variance of the trailing window of returns, annualized
+                var = np.clip((s2 - s * s / window) / (window - 1), 0, None)
+                vol[window:] = np.sqrt(var * TRADING_DAYS)
+            result[f"volatility_{window}"] = _to_list(vol)
+
+    return result
@@ -0,0 +1,210 @@
+"""
+Cross-worker cache invalidation through generation counters.
+
+Keys hash into a fixed number of slots, each holding a generation number.
+Invalidating a key bumps its slot; cache entries record the generation seen
+before their value was computed and are ignored once it has moved on. A
+worker therefore never serves an entry invalidated by another worker, even
+with a per-process cache backend. Slot collisions only cause extra misses.
+
+A generation is (epoch, counter). The epoch is a random token created with
+the counter table, so if the table is lost (file deleted, Redis flushed or
+the key evicted) counters restarting from zero can never reproduce an
+earlier generation.
+
+Two buses share this interface:
+
+- SharedMemoryBus (default): the counters live in a small memory-mapped
+  file, shared by every worker on the host. Reads are plain memory loads;
+  bumps are serialized with an flock.
+- RedisBus (REDIS_URL set): the counters live in Redis and bumps are
+  broadcast with pub/sub, so each worker keeps an up-to-date local copy and
+  reads never leave the process.
+"""
+import fcntl
+import mmap
+import os
+import secrets
+import struct
+import threading
+import time
+import zlib
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PATH = os.path.join(PROJECT_ROOT, 'instance', 'invalidation.gen')
+DEFAULT_SLOTS = 4096
+_SLOT = struct.Struct('<Q')
+# File header: magic, then the epoch; the slots follow
+_MAGIC = b'WPGEN002'
+_HEADER = struct.Struct('<8sQ')
+
+
+def slot_of(key, slots):
+    """Stable slot of a key (crc32: Python's hash() differs between processes)."""
+    return zlib.crc32(key.encode()) % slots
+
+
+class SharedMemoryBus:
+    """Generation counters in a memory-mapped file shared by local processes."""
+
+    name = 'shared-memory'
+
+    def __init__(self, path=DEFAULT_PATH, slots=DEFAULT_SLOTS):
+        self.path = path
+        self.slots = slots
+        size = _HEADER.size + slots * _SLOT.size
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                header = os.pread(fd, _HEADER.size, 0)
+                magic, epoch = _HEADER.unpack(header) if len(header) == _HEADER.size else (b'', 0)
+                if magic != _MAGIC or os.fstat(fd).st_size != size:
+                    # New file, older layout or different slot count: start a new epoch
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, size)
+                    epoch = secrets.randbits(63) or 1
+                    os.pwrite(fd, _HEADER.pack(_MAGIC, epoch), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._mm = mmap.mmap(fd, size, mmap.MAP_SHARED)
+        finally:
+            os.close(fd)
+        self.epoch = epoch
+        self._lock_fd = None
+        self._lock_pid = None
+        self._thread_lock = threading.Lock()
+
+    def _offset(self, key):
+        return _HEADER.size + slot_of(key, self.slots) * _SLOT.size
+
+    def generation(self, key):
+        return (self.epoch, _SLOT.unpack_from(self._mm, self._offset(key))[0])
+
+    def _file_lock(self):
+        # flock descriptors must not be inherited across fork
+        if self._lock_pid != os.getpid():
+            self._lock_fd = os.open(self.path, os.O_RDWR)
+            self._lock_pid = os.getpid()
+        return self._lock_fd
+
+    def invalidate(self, key):
+        offset = self._offset(key)
+        with self._thread_lock:
+            fd = self._file_lock()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                gen = _SLOT.unpack_from(self._mm, offset)[0] + 1
+                _SLOT.pack_into(self._mm, offset, gen)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        return (self.epoch, gen)
+
+    def stats(self):
+        return {'bus': self.name, 'slots': self.slots, 'path': self.path, 'epoch': self.epoch}
+
+
+class RedisBus:
+    """Generation counters in Redis, mirrored locally through pub/sub.
+
+    All counters and the epoch share one hash, so losing it (flush or
+    eviction) loses them together and the next bump starts a new epoch.
+    """
+
+    name = 'redis'
+
+    def __init__(self, url, slots=DEFAULT_SLOTS, prefix='wp:gen'):
+        import redis  # optional dependency, only needed with REDIS_URL
+        self.redis = redis.Redis.from_url(url)
+        self.slots = slots
+        self.key = f"{prefix}:{slots}"
+        self.channel = f"{prefix}:bump"
+        self._epoch = None
+        self._local = [0] * slots
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self.reconnects = 0
+
+    def _reload(self):
+        """Copy the epoch and every counter from Redis (startup, lost subscription, new epoch)."""
+        with self._reload_lock:
+            self.redis.hsetnx(self.key, 'epoch', secrets.token_hex(8))
+            values = self.redis.hgetall(self.key)
+            epoch = values.pop(b'epoch').decode()
+            counters = [0] * self.slots
+            for slot, value in values.items():
+                counters[int(slot)] = int(value)
+            if epoch == self._epoch:
+                # Counters only grow; never step back behind a bump applied meanwhile
+                counters = [max(c, local) for c, local in zip(counters, self._local)]
+            self._local = counters
+            self._epoch = epoch
+
+    def _ensure_listener(self):
+        # Started lazily so each forked worker runs its own subscriber thread
+        if self._listener_pid == os.getpid():
+            return
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._reload()
+            self._listener_pid = os.getpid()
+            threading.Thread(target=self._listen, name='invalidation-bus', daemon=True).start()
+
+    def _apply(self, epoch, slot, gen):
+        if epoch != self._epoch:
+            self._reload()
+        elif gen > self._local[slot]:
+            self._local[slot] = gen
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Bumps published while unsubscribed would otherwise be lost
+                self._reload()
+                for message in pubsub.listen():
+                    epoch, slot, gen = message['data'].decode().split(':')
+                    self._apply(epoch, int(slot), int(gen))
+            except Exception as e:
+                self.reconnects += 1
+                print(f"Warning: invalidation bus subscription lost ({e}); reconnecting")
+                time.sleep(1.0)
+
+    def generation(self, key):
+        self._ensure_listener()
+        return (self._epoch, self._local[slot_of(key, self.slots)])
+
+    def invalidate(self, key):
+        self._ensure_listener()
+        slot = slot_of(key, self.slots)
+        pipe = self.redis.pipeline(transaction=True)
+        # Recreates the epoch first if the hash was flushed or evicted
+        pipe.hsetnx(self.key, 'epoch', secrets.token_hex(8))
+        pipe.hincrby(self.key, slot, 1)
+        pipe.hget(self.key, 'epoch')
+        _, gen, epoch = pipe.execute()
+        epoch = epoch.decode()
+        # Apply locally right away; other workers catch up through pub/sub
+        self._apply(epoch, slot, gen)
+        self.redis.publish(self.channel, f"{epoch}:{slot}:{gen}")
+        return (epoch, gen)
+
+    def stats(self):
+        return {'bus': self.name, 'slots': self.slots, 'channel': self.channel, 'epoch': self._epoch,
+                'reconnects': self.reconnects}
+
+
+def bus_from_env():
+    """RedisBus when REDIS_URL is set (and redis is installed), else SharedMemoryBus."""
+    slots = int(os.getenv('INVALIDATION_SLOTS', str(DEFAULT_SLOTS)))
+    redis_url = os.getenv('REDIS_URL')
+    if redis_url:
+        try:
+            return RedisBus(redis_url, slots=slots)
+        except ImportError:
+            print("Warning: redis package not installed; using the shared-memory invalidation bus")
+    return SharedMemoryBus(os.getenv('INVALIDATION_PATH', DEFAULT_PATH), slots=slots)
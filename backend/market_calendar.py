@@ -0,0 +1,128 @@
+"""
+NYSE trading calendar used to size finance cache lifetimes.
+
+Quotes and daily bars only move during the regular session, so memo entries
+can live until the next session opens once the market has closed. Holidays
+follow the NYSE rules; early closes are treated as full sessions. Eastern
+time is derived from the US DST rules so no tz database is required.
+"""
+import datetime as dt
+import functools
+
+SESSION_OPEN = dt.time(9, 30)
+# Close plus a short settle window for the official closing print
+SESSION_SETTLED = dt.time(16, 15)
+# Upper bound for a closed-market TTL (covers long holiday weekends)
+MAX_CLOSED_TTL = 4 * 24 * 3600
+
+
+def _nth_weekday(year, month, weekday, n):
+    """Date of the n-th weekday (0=Monday) of a month; n=-1 for the last one."""
+    if n > 0:
+        first = dt.date(year, month, 1)
+        return first + dt.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    nxt = dt.date(year + month // 12, month % 12 + 1, 1)
+    last = nxt - dt.timedelta(days=1)
+    return last - dt.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year):
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return dt.date(year, month, day + 1)
+
+
+def _observed(day):
+    """Saturday holidays move to Friday, Sunday holidays to Monday."""
+    if day.weekday() == 5:
+        return day - dt.timedelta(days=1)
+    if day.weekday() == 6:
+        return day + dt.timedelta(days=1)
+    return day
+
+
+@functools.lru_cache(maxsize=32)
+def nyse_holidays(year):
+    """Full-day NYSE closures in a calendar year."""
+    days = {
+        _nth_weekday(year, 1, 0, 3),                   # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),                   # Washington's Birthday
+        _easter(year) - dt.timedelta(days=2),          # Good Friday
+        _nth_weekday(year, 5, 0, -1),                  # Memorial Day
+        _observed(dt.date(year, 7, 4)),                # Independence Day
+        _nth_weekday(year, 9, 0, 1),                   # Labor Day
+        _nth_weekday(year, 11, 3, 4),                  # Thanksgiving
+        _observed(dt.date(year, 12, 25)),              # Christmas
+    }
+    # NYSE does not close on Friday Dec 31 for a Saturday New Year's Day
+    new_year = dt.date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(dt.date(year, 6, 19)))      # Juneteenth
+    return frozenset(days)
+
+
+def is_trading_day(day):
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+
+def eastern_now(now=None):
+    """Current US/Eastern wall-clock time as a naive datetime."""
+    utc = now or dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+    year = utc.year
+    # DST: second Sunday of March 02:00 EST to first Sunday of November 02:00 EDT
+    dst_start = dt.datetime.combine(_nth_weekday(year, 3, 6, 2), dt.time(7))
+    dst_end = dt.datetime.combine(_nth_weekday(year, 11, 6, 1), dt.time(6))
+    offset = 4 if dst_start <= utc < dst_end else 5
+    return utc - dt.timedelta(hours=offset)
+
+
+def is_market_open(now=None):
+    """True during the regular session (including the settle window)."""
+    local = eastern_now(now)
+    return is_trading_day(local.date()) and SESSION_OPEN <= local.time() < SESSION_SETTLED
+
+
+def current_session_date(now=None):
+    """Most recent trading day whose session has opened (today once trading starts)."""
+    local = eastern_now(now)
+    day = local.date()
+    if local.time() < SESSION_OPEN:
+        day -= dt.timedelta(days=1)
+    while not is_trading_day(day):
+        day -= dt.timedelta(days=1)
+    return day
+
+
+def seconds_until_open(now=None):
+    """Seconds until the next regular session opens (0 while it is open)."""
+    local = eastern_now(now)
+    if is_trading_day(local.date()) and local.time() < SESSION_SETTLED:
+        if local.time() >= SESSION_OPEN:
+            return 0
+        day = local.date()
+    else:
+        day = local.date() + dt.timedelta(days=1)
+        while not is_trading_day(day):
+            day += dt.timedelta(days=1)
+    return (dt.datetime.combine(day, SESSION_OPEN) - local).total_seconds()
+
+
+def market_ttl(session_ttl, max_ttl=MAX_CLOSED_TTL):
+    """TTL callable: session_ttl while trading, otherwise until the next open."""
+    def ttl():
+        wait = seconds_until_open()
+        if wait <= 0:
+            return session_ttl
+        return int(min(max(wait, session_ttl), max_ttl))
+    return ttl
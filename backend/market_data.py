@@ -0,0 +1,274 @@
+"""
+Market data providers used by backend.finance.
+
+A provider answers three questions: daily close history, latest quotes and
+company info. The active provider is chosen with MARKET_DATA_PROVIDER:
+
+- yfinance (default): live Yahoo Finance data.
+- record: proxies yfinance and writes every response under MARKET_DATA_DIR.
+- replay: answers only from recorded responses, never touching the network,
+  after an injected delay of MARKET_DATA_LATENCY_MS (+ up to
+  MARKET_DATA_JITTER_MS) so benchmarks can model upstream latency.
+
+Other sources can be plugged in with register_provider().
+"""
+import datetime as dt
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RECORD_DIR = os.path.join(PROJECT_ROOT, 'instance', 'market_data')
+_PERIOD_RE = re.compile(r'^(\d+)(d|wk|mo|y)$')
+
+
+def period_window(period, today=None):
+    """Translate a yfinance period into (start_date, bar_count); either may be None.
+
+    Args:
+        period (str): 1d, 5d, 1wk, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd or max.
+        today (datetime.date): Day the period ends on (default: today).
+
+    Raises:
+        ValueError: If period is not in yfinance's format.
+    """
+    if period in (None, "max"):
+        return None, None
+    today = today or dt.date.today()
+    if period == "ytd":
+        return dt.date(today.year, 1, 1).isoformat(), None
+    match = _PERIOD_RE.match(period)
+    if not match:
+        raise ValueError(f"Invalid period {period}")
+    n, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        # yfinance counts day periods in trading sessions
+        return None, n
+    if unit == "wk":
+        start = today - dt.timedelta(weeks=n)
+    elif unit == "mo":
+        start = (pd.Timestamp(today) - pd.DateOffset(months=n)).date()
+    else:
+        start = (pd.Timestamp(today) - pd.DateOffset(years=n)).date()
+    return start.isoformat(), None
+
+
+class MarketDataProvider:
+    """Interface of a market data source."""
+
+    name = 'base'
+
+    def history(self, ticker, period=None, start=None, end=None):
+        """Daily closes as (labels, prices); labels are YYYY-MM-DD, end is exclusive."""
+        raise NotImplementedError
+
+    def quotes(self, tickers):
+        """Latest close per ticker as a dict; tickers without data are omitted."""
+        raise NotImplementedError
+
+    def info(self, ticker):
+        """Raw company info dict (yfinance field names), empty when unknown."""
+        raise NotImplementedError
+
+
+def _close_frame(df, tickers):
+    """Close prices with one column per ticker (yfinance may or may not add a ticker level)."""
+    close = df["Close"]
+    if isinstance(close, pd.Series):
+        close = close.to_frame(tickers[0])
+    return close
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = 'yfinance'
+
+    def __init__(self):
+        import yfinance as yf
+        self.yf = yf
+
+    def history(self, ticker, period=None, start=None, end=None):
+        if start is not None:
+            df = self.yf.download(ticker, start=start, end=end, auto_adjust=True, progress=False)
+        else:
+            df = self.yf.download(ticker, period=period or "max", auto_adjust=True, progress=False)
+        if df.empty:
+            return [], []
+        close = _close_frame(df, [ticker]).iloc[:, 0].dropna()
+        labels = close.index.strftime('%Y-%m-%d').tolist()
+        # Format prices to 2 decimal places
+        prices = [round(float(price), 2) for price in close.astype(float).tolist()]
+        return labels, prices
+
+    def quotes(self, tickers):
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        # One batched download instead of a history() round trip per ticker
+        df = self.yf.download(tickers, period='2d', auto_adjust=True, progress=False, group_by='column')
+        if df.empty:
+            return {}
+        close = _close_frame(df, tickers)
+        prices = {}
+        for t in tickers:
+            if t not in close.columns:
+                continue
+            series = close[t].dropna()
+            if not series.empty:
+                prices[t] = round(float(series.iloc[-1]), 2)
+        return prices
+
+    def info(self, ticker):
+        t = self.yf.Ticker(ticker)
+        # Prefer get_info() on newer yfinance, fallback to .info
+        try:
+            return t.get_info() or {}
+        except Exception:
+            return getattr(t, 'info', {}) or {}
+
+
+class RecordReplayProvider(MarketDataProvider):
+    """Records another provider's responses to disk, or replays them offline.
+
+    History recordings are merged per ticker, so replayed period and
+    start/end requests are answered by filtering the recorded bars; periods
+    are counted back from the last recorded bar.
+    """
+
+    name = 'replay'
+
+    def __init__(self, directory=DEFAULT_RECORD_DIR, upstream=None, latency_ms=0.0, jitter_ms=0.0):
+        self.directory = directory
+        self.upstream = upstream
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._lock = threading.Lock()
+        for kind in ('history', 'quotes', 'info'):
+            os.makedirs(os.path.join(directory, kind), exist_ok=True)
+
+    @property
+    def recording(self):
+        return self.upstream is not None
+
+    def _path(self, kind, ticker):
+        # Keep file names safe while staying readable for plain tickers
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', ticker)
+        if safe != ticker:
+            safe += '-' + hashlib.sha1(ticker.encode()).hexdigest()[:8]
+        return os.path.join(self.directory, kind, safe + '.json')
+
+    def _read(self, kind, ticker):
+        try:
+            with open(self._path(kind, ticker)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, kind, ticker, payload):
+        path = self._path(kind, ticker)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+
+    def _delay(self):
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def history(self, ticker, period=None, start=None, end=None):
+        if self.recording:
+            labels, prices = self.upstream.history(ticker, period=period, start=start, end=end)
+            with self._lock:
+                bars = self._read('history', ticker) or {}
+                bars.update(zip(labels, prices))
+                self._write('history', ticker, bars)
+            return labels, prices
+
+        self._delay()
+        bars = self._read('history', ticker)
+        if bars is None:
+            raise LookupError(f"No recorded history for {ticker}")
+        items = sorted(bars.items())
+        if start is not None:
+            items = [(d, p) for d, p in items if d >= start and (end is None or d < end)]
+        elif items:
+            # Periods end at the last recorded bar, i.e. when the recording was made
+            period_start, bar_count = period_window(period, dt.date.fromisoformat(items[-1][0]))
+            if bar_count is not None:
+                items = items[-bar_count:]
+            elif period_start is not None:
+                items = [(d, p) for d, p in items if d >= period_start]
+        return [d for d, _ in items], [p for _, p in items]
+
+    def quotes(self, tickers):
+        if self.recording:
+            prices = self.upstream.quotes(tickers)
+            for t, price in prices.items():
+                self._write('quotes', t, price)
+            return prices
+
+        self._delay()
+        prices = {}
+        for t in tickers:
+            price = self._read('quotes', t)
+            if price is not None:
+                prices[t] = price
+        return prices
+
+    def info(self, ticker):
+        if self.recording:
+            info = self.upstream.info(ticker)
+            self._write('info', ticker, info)
+            return info
+
+        self._delay()
+        return self._read('info', ticker) or {}
+
+
+def _record_replay_from_env(record):
+    return RecordReplayProvider(
+        directory=os.getenv('MARKET_DATA_DIR', DEFAULT_RECORD_DIR),
+        upstream=YFinanceProvider() if record else None,
+        latency_ms=float(os.getenv('MARKET_DATA_LATENCY_MS', '0')),
+        jitter_ms=float(os.getenv('MARKET_DATA_JITTER_MS', '0')),
+    )
+
+
+_factories = {
+    'yfinance': YFinanceProvider,
+    'record': lambda: _record_replay_from_env(record=True),
+    'replay': lambda: _record_replay_from_env(record=False),
+}
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def register_provider(name, factory):
+    """Make a provider selectable as MARKET_DATA_PROVIDER=name."""
+    _factories[name] = factory
+
+
+def set_provider(provider):
+    """Replace the active provider (None re-reads MARKET_DATA_PROVIDER)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
+
+
+def get_provider():
+    """Process-wide provider selected by MARKET_DATA_PROVIDER."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                name = os.getenv('MARKET_DATA_PROVIDER', 'yfinance').strip().lower()
+                if name not in _factories:
+                    raise ValueError(f"Unknown MARKET_DATA_PROVIDER {name!r}")
+                _provider = _factories[name]()
+    return _provider
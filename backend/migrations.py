@@ -0,0 +1,87 @@
+"""
+Lightweight schema migrations run from init_db().
+
+db.create_all() only creates missing tables, so changes to existing tables
+(new indexes in particular) are applied here. Each migration runs once per
+database in its own transaction and is recorded in schema_migrations.
+Migrations must be idempotent: several workers may start at the same time.
+"""
+import datetime
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+
+_meta = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _meta,
+    Column('id', String(64), primary_key=True),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+# (id, callable(connection, metadata)) in application order
+MIGRATIONS = []
+
+
+def migration(migration_id):
+    """Register a migration; ids are applied in registration order."""
+    def register(fn):
+        MIGRATIONS.append((migration_id, fn))
+        return fn
+    return register
+
+
+def _create_indexes(conn, metadata, table_name, index_names):
+    """Create model-declared indexes that an older database is missing."""
+    indexes = {ix.name: ix for ix in metadata.tables[table_name].indexes}
+    for name in index_names:
+        indexes[name].create(conn, checkfirst=True)
+
+
+@migration('0001_dashinfo_indexes')
+def _dashinfo_indexes(conn, metadata):
+    # Holdings lookups and per-ticker deletes, and the date-ordered history
+    _create_indexes(conn, metadata, 'dashinfo', ['ix_dashinfo_user_ticker_type', 'ix_dashinfo_user_date'])
+
+
+@migration('0002_transaction_change_created_at')
+def _transaction_change_created_at(conn, metadata):
+    # Change-log retention is by age; rows logged before this column stay NULL
+    columns = {c['name'] for c in inspect(conn).get_columns('transaction_change')}
+    if 'created_at' not in columns:
+        conn.execute(text('ALTER TABLE transaction_change ADD COLUMN created_at TIMESTAMP'))
+    _create_indexes(conn, metadata, 'transaction_change', ['ix_transaction_change_user_created'])
+
+
+def run_migrations(engine, metadata):
+    """Apply pending migrations.
+
+    Args:
+        engine: SQLAlchemy engine of the application database.
+        metadata: The models' MetaData (indexes are looked up by name).
+
+    Returns:
+        list: Ids of the migrations applied by this call.
+    """
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        done = set(conn.execute(select(schema_migrations.c.id)).scalars())
+
+    applied = []
+    for migration_id, fn in MIGRATIONS:
+        if migration_id in done:
+            continue
+        try:
+            with engine.begin() as conn:
+                fn(conn, metadata)
+                conn.execute(schema_migrations.insert().values(
+                    id=migration_id, applied_at=datetime.datetime.utcnow()))
+            applied.append(migration_id)
+            print(f"✅ Applied migration {migration_id}")
+        except Exception as e:
+            # Another worker may have applied it concurrently
+            with engine.connect() as conn:
+                row = conn.execute(select(schema_migrations.c.id).where(
+                    schema_migrations.c.id == migration_id)).first()
+            if row is None:
+                raise
+            print(f"Migration {migration_id} already applied by another process ({type(e).__name__})")
+    return applied
@@ -0,0 +1,173 @@
+"""
+Vectorized portfolio analytics over cached daily closes.
+
+Transactions and price series are aligned on one trading-date index and the
+whole history is computed with array operations (no per-day Python loop):
+share deltas are scattered into a (days x tickers) matrix and accumulated,
+then multiplied with the forward-filled price matrix.
+"""
+import datetime as dt
+
+import numpy as np
+
+_EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
+TRADING_DAYS = 252
+
+
+def align_closes(series, tickers, start=None):
+    """Align daily closes of several tickers on the union of their trading dates.
+
+    Args:
+        series (dict): ticker -> (labels, prices) as returned by get_stock_data.
+        tickers (list): Column order of the result.
+        start (str): Optional first date (YYYY-MM-DD) of the index.
+
+    Returns:
+        tuple: (dates, prices) - datetime64[D] array of length D and a (D x T)
+        float matrix, forward-filled; NaN before a ticker's first close.
+    """
+    parsed = {}
+    for t in tickers:
+        labels, closes = series.get(t, ([], []))
+        parsed[t] = (np.asarray(labels, dtype='datetime64[D]'), np.asarray(closes, dtype=float))
+    non_empty = [d for d, _ in parsed.values() if len(d)]
+    dates = np.unique(np.concatenate(non_empty)) if non_empty else np.empty(0, dtype='datetime64[D]')
+    if start is not None:
+        dates = dates[dates >= np.datetime64(start, 'D')]
+
+    prices = np.full((len(dates), len(tickers)), np.nan)
+    for j, t in enumerate(tickers):
+        t_dates, t_closes = parsed[t]
+        if not len(t_dates):
+            continue
+        # Index of the last close on or before each date (forward fill)
+        idx = np.searchsorted(t_dates, dates, side='right') - 1
+        valid = idx >= 0
+        prices[valid, j] = t_closes[idx[valid]]
+    return dates, prices
+
+
+def portfolio_history(tx_dates, tx_tickers, tx_amounts, tx_cash, series):
+    """Daily value, cost basis and P&L of a transaction history.
+
+    Args:
+        tx_dates (list): Transaction datetimes.
+        tx_tickers (list): Ticker of each transaction.
+        tx_amounts (list): Signed share amounts (sells negative).
+        tx_cash (list): Signed cash invested (buy cost positive, sell proceeds negative).
+        series (dict): ticker -> (labels, prices) daily closes.
+
+    Returns:
+        dict: 'dates', 'value', 'cost_basis' (net cash invested) and 'pnl'
+        lists, one entry per trading day from the first transaction on.
+    """
+    empty = {'dates': [], 'value': [], 'cost_basis': [], 'pnl': []}
+    if not len(tx_dates):
+        return empty
+
+    tickers = sorted(set(tx_tickers))
+    days = (np.fromiter((d.toordinal() for d in tx_dates), dtype=np.int64, count=len(tx_dates))
+            - _EPOCH_ORDINAL).astype('datetime64[D]')
+    dates, prices = align_closes(series, tickers, start=str(days.min()))
+    if not len(dates):
+        return empty
+
+    # Transactions on non-trading days count from the next session
+    day_idx = np.minimum(np.searchsorted(dates, days, side='left'), len(dates) - 1)
+    col = {t: j for j, t in enumerate(tickers)}
+    ticker_idx = np.fromiter((col[t] for t in tx_tickers), dtype=int, count=len(tx_tickers))
+
+    deltas = np.zeros((len(dates), len(tickers)))
+    np.add.at(deltas, (day_idx, ticker_idx), np.asarray(tx_amounts, dtype=float))
+    shares = np.cumsum(deltas, axis=0)
+
+    flows = np.zeros(len(dates))
+    np.add.at(flows, day_idx, np.asarray(tx_cash, dtype=float))
+    cost_basis = np.cumsum(flows)
+
+    # Before a ticker's first close, value its shares at that first close
+    first = np.argmax(~np.isnan(prices), axis=0)
+    first_close = prices[first, np.arange(len(tickers))]
+    prices = np.where(np.isnan(prices), first_close, prices)
+    value = np.nansum(shares * prices, axis=1)
+
+    return {
+        'dates': dates.astype(str).tolist(),
+        'value': np.round(value, 2).tolist(),
+        'cost_basis': np.round(cost_basis, 2).tolist(),
+        'pnl': np.round(value - cost_basis, 2).tolist(),
+    }
+
+
+def risk_metrics(weights, series, benchmark=None, risk_free_rate=0.0, lookback=252):
+    """Risk statistics of a fixed-weight portfolio from one daily returns matrix.
+
+    Args:
+        weights (dict): ticker -> current market value (normalized internally).
+        series (dict): ticker -> (labels, prices) daily closes, including the
+            benchmark's.
+        benchmark (str): Ticker to compute beta against (optional).
+        risk_free_rate (float): Annual risk-free rate, e.g. 0.04.
+        lookback (int): Number of daily returns to use.
+
+    Returns:
+        dict: Annualized return and volatility, Sharpe and Sortino ratios,
+        maximum drawdown, beta, per-holding volatility and the pairwise
+        correlation matrix of the holdings.
+    """
+    tickers = sorted(weights)
+    columns = tickers + ([benchmark] if benchmark and benchmark not in weights else [])
+    dates, prices = align_closes(series, columns)
+    prices = prices[-(lookback + 1):]
+    dates = dates[-(lookback + 1):]
+    returns = prices[1:] / prices[:-1] - 1.0
+    # Only days on which every column has a return
+    complete = np.isfinite(returns).all(axis=1)
+    returns = returns[complete]
+    if len(returns) < 2:
+        raise ValueError("Not enough overlapping price history to compute risk metrics")
+
+    w = np.array([weights[t] for t in tickers], dtype=float)
+    if w.sum() <= 0:
+        raise ValueError("Portfolio has no market value")
+    w /= w.sum()
+    holdings = returns[:, :len(tickers)]
+    port = holdings @ w
+
+    rf_daily = risk_free_rate / TRADING_DAYS
+    ann_return = port.mean() * TRADING_DAYS
+    ann_vol = port.std(ddof=1) * np.sqrt(TRADING_DAYS)
+    downside = np.sqrt(np.mean(np.minimum(port - rf_daily, 0.0) ** 2)) * np.sqrt(TRADING_DAYS)
+    growth = np.cumprod(1.0 + port)
+    drawdown = growth / np.maximum.accumulate(np.maximum(growth, 1.0)) - 1.0
+
+    beta = None
+    if benchmark:
+        bench = returns[:, columns.index(benchmark)]
+        var = bench.var(ddof=1)
+        beta = float(np.cov(port, bench, ddof=1)[0, 1] / var) if var > 0 else None
+
+    corr = np.corrcoef(holdings, rowvar=False) if len(tickers) > 1 else np.ones((1, 1))
+    corr = np.where(np.isfinite(corr), corr, 0.0)
+
+    def ratio(num, den):
+        return round(float(num / den), 4) if den > 0 else None
+
+    return {
+        'start': str(dates[0]),
+        'end': str(dates[-1]),
+        'observations': int(len(port)),
+        'weights': {t: round(float(x), 6) for t, x in zip(tickers, w)},
+        'annualized_return': round(float(ann_return), 6),
+        'annualized_volatility': round(float(ann_vol), 6),
+        'sharpe_ratio': ratio(ann_return - risk_free_rate, ann_vol),
+        'sortino_ratio': ratio(ann_return - risk_free_rate, downside),
+        'max_drawdown': round(float(drawdown.min()), 6),
+        'benchmark': benchmark,
+        'beta': round(beta, 4) if beta is not None else None,
+        'holding_volatility': {
+            t: round(float(v), 6)
+            for t, v in zip(tickers, holdings.std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS))
+        },
+        'correlation': {'tickers': tickers, 'matrix': np.round(corr, 4).tolist()},
+    }
@@ -0,0 +1,125 @@
+"""
+Persistent per-ticker daily price history.
+
+Bars are stored in a SQLite file under instance/ so they survive restarts and
+gunicorn worker recycling. get_stock_data() tops the store up with only the
+bars after the last stored one and answers every period / date-range query
+from local data.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STORE_PATH = os.path.join(PROJECT_ROOT, 'instance', 'price_history.db')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    ticker TEXT NOT NULL,
+    date TEXT NOT NULL,
+    close REAL NOT NULL,
+    PRIMARY KEY (ticker, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tickers (
+    ticker TEXT PRIMARY KEY,
+    checked_at REAL NOT NULL
+);
+"""
+
+
+class PriceHistoryStore:
+    """SQLite-backed store of daily closes keyed by (ticker, YYYY-MM-DD)."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self):
+        # One connection per thread; WAL lets readers in other workers proceed
+        # while a refresh is being written.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def checked_at(self, ticker):
+        """Unix time of the last upstream refresh of ticker, or None."""
+        row = self._connection().execute(
+            'SELECT checked_at FROM tickers WHERE ticker = ?', (ticker,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def last_dates(self, ticker, count=2):
+        """Most recent stored bar dates for ticker, newest first."""
+        rows = self._connection().execute(
+            'SELECT date FROM bars WHERE ticker = ? ORDER BY date DESC LIMIT ?',
+            (ticker, count),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def close_on(self, ticker, date):
+        row = self._connection().execute(
+            'SELECT close FROM bars WHERE ticker = ? AND date = ?', (ticker, date)
+        ).fetchone()
+        return row[0] if row else None
+
+    def upsert(self, ticker, labels, prices, replace=False):
+        """Insert or overwrite bars and mark ticker as freshly checked.
+
+        With replace=True every existing bar of ticker is dropped first (used
+        after a split/dividend re-adjusted the whole series upstream).
+        """
+        with self._connection() as conn:
+            if replace:
+                conn.execute('DELETE FROM bars WHERE ticker = ?', (ticker,))
+            conn.executemany(
+                'INSERT OR REPLACE INTO bars (ticker, date, close) VALUES (?, ?, ?)',
+                [(ticker, d, p) for d, p in zip(labels, prices)],
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO tickers (ticker, checked_at) VALUES (?, ?)',
+                (ticker, time.time()),
+            )
+
+    def read(self, ticker, start=None, end=None):
+        """Return (labels, prices) with start <= date < end (both optional)."""
+        sql = 'SELECT date, close FROM bars WHERE ticker = ?'
+        params = [ticker]
+        if start is not None:
+            sql += ' AND date >= ?'
+            params.append(start)
+        if end is not None:
+            sql += ' AND date < ?'
+            params.append(end)
+        rows = self._connection().execute(sql + ' ORDER BY date', params).fetchall()
+        return [r[0] for r in rows], [r[1] for r in rows]
+
+    def tail(self, ticker, count):
+        """Return the last count bars of ticker as (labels, prices)."""
+        rows = self._connection().execute(
+            'SELECT date, close FROM bars WHERE ticker = ? ORDER BY date DESC LIMIT ?',
+            (ticker, count),
+        ).fetchall()
+        rows.reverse()
+        return [r[0] for r in rows], [r[1] for r in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_price_store():
+    """Process-wide store instance (path overridable with PRICE_STORE_PATH)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PriceHistoryStore(os.getenv('PRICE_STORE_PATH', DEFAULT_STORE_PATH))
+    return _store
@@ -0,0 +1,198 @@
+"""
+Per-IP request rate tracking for the anomaly detection in app.py.
+
+Each IP gets a ring of per-bucket counters covering a sliding window (60s in
+12 buckets of 5s by default), so recording a request and reading the window
+count are O(1) with constant memory per IP. IPs live in an LRU table with a
+hard size cap; idle IPs are evicted first.
+
+SlidingWindowTracker counts per worker process. RedisRequestTracker keeps
+the same buckets in Redis (one pipelined round trip per request) so counts
+and the active/suspicious IP figures cover the whole fleet; it falls back to
+a local tracker while Redis is unavailable.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class SlidingWindowTracker:
+    """In-process sliding-window counter per client IP.
+
+    Args:
+        window (int): Window length in seconds.
+        buckets (int): Ring size; the window moves in window/buckets steps.
+        max_ips (int): Upper bound on tracked IPs (least recently seen evicted).
+        flag_ttl (int): Seconds an IP stays counted as suspicious.
+    """
+
+    scope = 'worker'
+
+    def __init__(self, window=60, buckets=12, max_ips=10000, flag_ttl=3600, max_flagged=10000):
+        self.window = window
+        self.buckets = buckets
+        self.bucket_seconds = window / buckets
+        self.max_ips = max_ips
+        self.flag_ttl = flag_ttl
+        self.max_flagged = max_flagged
+        self._ips = OrderedDict()  # ip -> [counts, last_bucket, total]
+        self._flagged = OrderedDict()  # ip -> flagged_at
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def _bucket(self, now):
+        return int(now // self.bucket_seconds)
+
+    def hit(self, ip, now=None):
+        """Record one request from ip; returns its request count in the window."""
+        now = time.time() if now is None else now
+        b = self._bucket(now)
+        with self._lock:
+            state = self._ips.get(ip)
+            if state is None:
+                state = self._ips[ip] = [[0] * self.buckets, b, 0]
+            else:
+                self._ips.move_to_end(ip)
+                self._advance(state, b)
+            state[0][b % self.buckets] += 1
+            state[2] += 1
+            self._evict(b)
+            return state[2]
+
+    def _advance(self, state, b):
+        counts, last, _ = state
+        gap = b - last
+        if gap >= self.buckets:
+            state[0] = [0] * self.buckets
+            state[2] = 0
+        else:
+            # Clear the buckets that slid out of the window (at most `buckets`)
+            for i in range(last + 1, b + 1):
+                state[2] -= counts[i % self.buckets]
+                counts[i % self.buckets] = 0
+        state[1] = max(last, b)
+
+    def _evict(self, b):
+        # The front of the LRU is the least recently seen IP
+        while self._ips:
+            ip, state = next(iter(self._ips.items()))
+            if len(self._ips) > self.max_ips or b - state[1] >= self.buckets:
+                del self._ips[ip]
+                self.evicted += 1
+            else:
+                break
+
+    def flag(self, ip, now=None):
+        """Mark ip as suspicious; True if it was not flagged already."""
+        now = time.time() if now is None else now
+        with self._lock:
+            new = ip not in self._flagged or now - self._flagged[ip] >= self.flag_ttl
+            self._flagged[ip] = now
+            self._flagged.move_to_end(ip)
+            while self._flagged:
+                first, flagged_at = next(iter(self._flagged.items()))
+                if len(self._flagged) > self.max_flagged or now - flagged_at >= self.flag_ttl:
+                    del self._flagged[first]
+                else:
+                    break
+            return new
+
+    def stats(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._evict(self._bucket(now))
+            suspicious = sum(1 for t in self._flagged.values() if now - t < self.flag_ttl)
+            return {'active_ips': len(self._ips), 'suspicious_ips': suspicious,
+                    'tracked_ip_limit': self.max_ips, 'evicted_ips': self.evicted, 'scope': self.scope}
+
+
+class RedisRequestTracker:
+    """Fleet-wide variant keeping the per-IP buckets in Redis.
+
+    Active IPs are estimated with one HyperLogLog per bucket; suspicious IPs
+    are a sorted set scored by flag time.
+    """
+
+    scope = 'fleet'
+
+    def __init__(self, url, window=60, buckets=12, flag_ttl=3600, prefix='wp:req', fallback=None):
+        import redis  # optional dependency, only needed with REDIS_URL
+        self.redis = redis.Redis.from_url(url, socket_timeout=0.25)
+        self.window = window
+        self.buckets = buckets
+        self.bucket_seconds = window / buckets
+        self.flag_ttl = flag_ttl
+        self.prefix = prefix
+        self.fallback = fallback or SlidingWindowTracker(window, buckets, flag_ttl=flag_ttl)
+        self._failed_until = 0.0
+
+    def _available(self):
+        return time.monotonic() >= self._failed_until
+
+    def _failed(self, e):
+        if self._available():
+            print(f"Warning: request tracker lost Redis ({e}); counting per worker for 30s")
+        self._failed_until = time.monotonic() + 30
+
+    def hit(self, ip, now=None):
+        now = time.time() if now is None else now
+        if not self._available():
+            return self.fallback.hit(ip, now)
+        b = int(now // self.bucket_seconds)
+        ttl = int(self.window + 2 * self.bucket_seconds)
+        key = f"{self.prefix}:{ip}:{b}"
+        ips_key = f"{self.prefix}:ips:{b}"
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.incr(key)
+            pipe.expire(key, ttl)
+            pipe.pfadd(ips_key, ip)
+            pipe.expire(ips_key, ttl)
+            pipe.mget([f"{self.prefix}:{ip}:{b - i}" for i in range(1, self.buckets)])
+            current, _, _, _, previous = pipe.execute()
+        except Exception as e:
+            self._failed(e)
+            return self.fallback.hit(ip, now)
+        return int(current) + sum(int(v) for v in previous if v is not None)
+
+    def flag(self, ip, now=None):
+        now = time.time() if now is None else now
+        if not self._available():
+            return self.fallback.flag(ip, now)
+        key = f"{self.prefix}:suspicious"
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zscore(key, ip)
+            pipe.zadd(key, {ip: now})
+            pipe.zremrangebyscore(key, 0, now - self.flag_ttl)
+            previous, _, _ = pipe.execute()
+        except Exception as e:
+            self._failed(e)
+            return self.fallback.flag(ip, now)
+        return previous is None or now - float(previous) >= self.flag_ttl
+
+    def stats(self, now=None):
+        now = time.time() if now is None else now
+        if not self._available():
+            return self.fallback.stats(now)
+        b = int(now // self.bucket_seconds)
+        try:
+            active = self.redis.pfcount(*[f"{self.prefix}:ips:{b - i}" for i in range(self.buckets)])
+            suspicious = self.redis.zcount(f"{self.prefix}:suspicious", now - self.flag_ttl, '+inf')
+        except Exception as e:
+            self._failed(e)
+            return self.fallback.stats(now)
+        return {'active_ips': int(active), 'suspicious_ips': int(suspicious), 'scope': self.scope}
+
+
+def tracker_from_env():
+    """RedisRequestTracker when REDIS_URL is set (and redis is installed), else per worker."""
+    max_ips = int(os.getenv('REQUEST_TRACKER_MAX_IPS', '10000'))
+    redis_url = os.getenv('REDIS_URL')
+    if redis_url:
+        try:
+            return RedisRequestTracker(redis_url, fallback=SlidingWindowTracker(max_ips=max_ips))
+        except ImportError:
+            print("Warning: redis package not installed; tracking requests per worker")
+    return SlidingWindowTracker(max_ips=max_ips)
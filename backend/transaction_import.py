@@ -0,0 +1,171 @@
+"""
+CSV parsing and validation for bulk transaction imports.
+
+Uploads are read in chunks with pandas and validated column-wise. Only the
+compact validated columns are kept (a few dozen bytes per row), so memory
+does not grow with the raw upload or with ORM objects. Common broker export
+headers are accepted ("Symbol", "Action", "Quantity", "Trade Date", ...).
+"""
+import numpy as np
+import pandas as pd
+
+# Canonical column -> accepted (lower-cased) header names
+COLUMN_ALIASES = {
+    'ticker': ('ticker', 'symbol', 'stock'),
+    'type': ('type', 'action', 'side', 'transaction type', 'activity'),
+    'shares': ('shares', 'quantity', 'qty', 'units'),
+    'price': ('price', 'price per share', 'fill price', 'trade price', 'avg price'),
+    'date': ('date', 'trade date', 'transaction date', 'datetime', 'time', 'run date'),
+}
+TYPE_ALIASES = {
+    'BUY': 1, 'BOUGHT': 1, 'B': 1, 'YOU BOUGHT': 1,
+    'SELL': -1, 'SOLD': -1, 'S': -1, 'YOU SOLD': -1,
+}
+TICKER_PATTERN = r'^[A-Z0-9][A-Z0-9.\-]{0,9}$'  # Dashinfo.ticker is String(10)
+MAX_REPORTED_ERRORS = 50
+
+
+class ImportValidationError(ValueError):
+    """Raised with the offending lines when an import is rejected."""
+
+    def __init__(self, errors, error_count=None):
+        self.errors = errors[:MAX_REPORTED_ERRORS]
+        self.error_count = error_count if error_count is not None else len(errors)
+        super().__init__(f"{self.error_count} invalid row(s); nothing was imported")
+
+
+def _resolve_columns(columns):
+    lookup = {str(c).strip().lower(): c for c in columns}
+    resolved = {}
+    for name, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lookup:
+                resolved[name] = lookup[alias]
+                break
+    missing = [c for c in ('ticker', 'shares', 'price', 'date') if c not in resolved]
+    if missing:
+        raise ImportValidationError([f"missing column(s): {', '.join(missing)}"])
+    return resolved
+
+
+def _numbers(series):
+    """Parse numbers such as '1,234.50', '$12.00' or '(5)' (negative); NaN if invalid."""
+    text = series.astype(str).str.strip().str.replace(r'[$,\s]', '', regex=True)
+    negative = text.str.startswith('(') & text.str.endswith(')')
+    text = text.str.strip('()')
+    values = pd.to_numeric(text, errors='coerce').to_numpy(dtype=float)
+    return np.where(negative.to_numpy(), -values, values)
+
+
+def _validate_chunk(chunk, columns, first_line):
+    n = len(chunk)
+    problems = np.full(n, None, dtype=object)
+
+    def flag(mask, reason):
+        # Keep the first problem found for each line
+        problems[mask & (problems == None)] = reason  # noqa: E711
+
+    ticker = chunk[columns['ticker']].astype(str).str.strip().str.upper()
+    flag(~ticker.str.match(TICKER_PATTERN).to_numpy(), 'invalid ticker')
+
+    shares = _numbers(chunk[columns['shares']])
+    if 'type' in columns:
+        side = chunk[columns['type']].astype(str).str.strip().str.upper().map(TYPE_ALIASES).to_numpy(dtype=float)
+        flag(np.isnan(side), 'type must be BUY or SELL')
+        amount = np.abs(shares) * side
+    else:
+        # Without a type column the quantity sign carries the side
+        amount = shares
+    flag(~np.isfinite(shares) | (np.abs(shares) < 1) | (shares != np.round(shares)),
+         'shares must be a non-zero whole number')
+
+    price = np.abs(_numbers(chunk[columns['price']]))
+    flag(~np.isfinite(price) | (price <= 0), 'price must be a positive number')
+
+    dates = pd.to_datetime(chunk[columns['date']], errors='coerce', utc=True, format='mixed')
+    flag(dates.isna().to_numpy(), 'invalid date')
+
+    bad = np.flatnonzero(problems != None)  # noqa: E711
+    errors = [f"line {first_line + i}: {problems[i]}" for i in bad[:MAX_REPORTED_ERRORS]]
+    ok = problems == None  # noqa: E711
+    rows = {
+        'ticker': ticker.to_numpy(dtype=object)[ok],
+        'amount': np.nan_to_num(amount[ok]).astype(np.int64),
+        'price': price[ok],
+        'date': dates.dt.tz_convert(None).to_numpy(dtype='datetime64[us]')[ok],
+        'line': np.arange(first_line, first_line + n)[ok],
+    }
+    return rows, errors, len(bad)
+
+
+def read_transactions_csv(source, chunksize=10000, max_rows=None):
+    """Parse and validate a transaction CSV.
+
+    Args:
+        source: Path or binary/text file object.
+        chunksize (int): Rows parsed per chunk.
+        max_rows (int): Reject files with more data rows than this.
+
+    Returns:
+        dict: 'ticker', 'amount' (signed shares), 'price', 'date'
+        (datetime64) and 'line' arrays, in file order.
+
+    Raises:
+        ImportValidationError: If any row is invalid (all-or-nothing).
+    """
+    parts, errors, error_count, total = [], [], 0, 0
+    try:
+        reader = pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False,
+                             skipinitialspace=True, on_bad_lines='error')
+        columns = None
+        for chunk in reader:
+            if columns is None:
+                columns = _resolve_columns(chunk.columns)
+            rows, chunk_errors, bad = _validate_chunk(chunk, columns, first_line=total + 2)
+            total += len(chunk)
+            if max_rows is not None and total > max_rows:
+                raise ImportValidationError([f"too many rows (maximum {max_rows})"])
+            parts.append(rows)
+            errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+            error_count += bad
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        raise ImportValidationError([f"unreadable CSV: {e}"])
+    if error_count:
+        raise ImportValidationError(errors, error_count)
+    if not total:
+        raise ImportValidationError(['no transactions found'])
+    return {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+
+def chronological_order(rows):
+    """Row order by date, keeping file order for equal dates."""
+    return np.lexsort((rows['line'], rows['date']))
+
+
+def check_holdings(rows, held):
+    """Lines whose sell would exceed the shares held at that point.
+
+    Running totals per ticker start from the current holdings and follow the
+    imported rows in chronological order.
+
+    Args:
+        rows (dict): Output of read_transactions_csv().
+        held (dict): ticker -> shares currently held.
+
+    Returns:
+        list: Error messages (empty when every sell is covered).
+    """
+    tickers, codes = np.unique(rows['ticker'], return_inverse=True)
+    order = np.lexsort((rows['line'], rows['date'], codes))
+    amount = rows['amount'][order]
+    group = codes[order]
+    running = np.cumsum(amount)
+    # Restart the cumulative sum at each ticker and add its starting holdings
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    offset = np.repeat(running[starts] - amount[starts], np.diff(np.r_[starts, len(group)]))
+    opening = np.array([held.get(t, 0) for t in tickers], dtype=np.int64)
+    balance = running - offset + opening[group]
+
+    short = np.flatnonzero((balance < 0) & (amount < 0))
+    lines = rows['line'][order]
+    return [f"line {lines[i]}: not enough {tickers[group[i]]} shares to sell" for i in short]
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmark of /api/finance/stock-data and /api/portfolio/stocks.
+
+Market data is replayed from recordings, so runs need no network. Record a
+fixture set once (this one run does hit Yahoo Finance):
+
+    python benchmarks/bench_finance_endpoints.py --record
+
+then benchmark offline with an injected upstream latency:
+
+    python benchmarks/bench_finance_endpoints.py --latency-ms 400
+
+"Cold" requests run with empty caches and an empty price store, "warm"
+requests repeat the call against the populated caches.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TICKERS = 'AAPL,MSFT,GOOG,AMZN,NVDA,META,TSLA,JPM,V,XOM'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--record', action='store_true', help='record fixtures from yfinance instead of benchmarking')
+    parser.add_argument('--data-dir', default=os.path.join(PROJECT_ROOT, 'instance', 'market_data'))
+    parser.add_argument('--tickers', default=DEFAULT_TICKERS)
+    parser.add_argument('--latency-ms', type=float, default=300.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--repeat', type=int, default=5)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    tickers = [t.strip().upper() for t in args.tickers.split(',') if t.strip()]
+    workdir = tempfile.mkdtemp(prefix='wp-bench-')
+    os.environ.update({
+        'MARKET_DATA_PROVIDER': 'record' if args.record else 'replay',
+        'MARKET_DATA_DIR': args.data_dir,
+        'MARKET_DATA_LATENCY_MS': str(args.latency_ms),
+        'MARKET_DATA_JITTER_MS': str(args.jitter_ms),
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'PRICE_STORE_PATH': os.path.join(workdir, 'price_history.db'),
+        'FLASK_ENV': 'development',
+    })
+    sys.path.insert(0, PROJECT_ROOT)
+    from backend import app as app_module
+    from backend import price_store
+
+    app_module.limiter.enabled = False
+    client = app_module.app.test_client()
+    headers = {'User-Agent': 'wp-bench'}
+    client.post('/api/auth/register', json={'username': 'benchuser', 'password': 'bench123'}, headers=headers)
+    for t in tickers:
+        client.post('/api/transactions', json={'ticker': t, 'shares': 10, 'price': 100, 'type': 'BUY'}, headers=headers)
+
+    def reset():
+        app_module.cache.clear()
+        price_store._store = None
+        for name in os.listdir(workdir):
+            if name.startswith('price_history.db'):
+                os.remove(os.path.join(workdir, name))
+
+    def timed(fn):
+        start = time.perf_counter()
+        rv = fn()
+        assert rv.status_code == 200, rv.get_data(as_text=True)
+        return (time.perf_counter() - start) * 1000
+
+    stock_data = lambda: client.post('/api/finance/stock-data', json={'ticker': tickers[0], 'period': '1y'}, headers=headers)
+    portfolio = lambda: client.get('/api/portfolio/stocks', headers=headers)
+
+    if args.record:
+        reset()
+        for t in tickers:
+            client.post('/api/finance/stock-data', json={'ticker': t, 'period': 'max'}, headers=headers)
+        portfolio()
+        print(f"Recorded {len(tickers)} tickers into {args.data_dir}")
+        shutil.rmtree(workdir, ignore_errors=True)
+        return
+
+    results = {}
+    for name, fn in (('stock-data', stock_data), ('portfolio', portfolio)):
+        cold, warm = [], []
+        for _ in range(args.repeat):
+            reset()
+            cold.append(timed(fn))
+            warm.append(timed(fn))
+        results[name] = (cold, warm)
+
+    print(f"{len(tickers)} positions, latency {args.latency_ms:.0f}ms (+{args.jitter_ms:.0f}ms jitter), {args.repeat} runs")
+    for name, (cold, warm) in results.items():
+        print(f"  {name:<11} cold median {statistics.median(cold):8.1f} ms   warm median {statistics.median(warm):8.2f} ms")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
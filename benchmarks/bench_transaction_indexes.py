@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Query times of the hot Dashinfo lookups before and after the index migration.
+
+Builds a throwaway SQLite database with --rows transactions spread over
+--users users, drops the Dashinfo indexes to mimic a database created before
+they existed, times the queries, upgrades it with run_migrations() and times
+them again:
+
+    python benchmarks/bench_transaction_indexes.py --rows 1000000
+"""
+import argparse
+import datetime
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TICKERS = ['AAPL', 'MSFT', 'GOOG', 'AMZN', 'NVDA', 'META', 'TSLA', 'JPM', 'V', 'XOM',
+           'KO', 'PEP', 'WMT', 'DIS', 'INTC', 'AMD', 'BAC', 'CVX', 'PFE', 'T']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=7)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='wp-bench-')
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'PRICE_STORE_PATH': os.path.join(workdir, 'price_history.db'),
+        'FLASK_ENV': 'development',
+    })
+    sys.path.insert(0, PROJECT_ROOT)
+    from sqlalchemy import func, insert, text
+    from backend import app as app_module
+    from backend.migrations import run_migrations
+
+    app, db, Dashinfo, User = app_module.app, app_module.db, app_module.Dashinfo, app_module.User
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'id': i, 'username': f'bench{i}', 'password': 'x'} for i in range(1, args.users + 1)
+        ])
+        start = datetime.datetime(2015, 1, 1)
+        batch = []
+        for _ in range(args.rows):
+            amount = rng.randint(1, 50) * (1 if rng.random() < 0.7 else -1)
+            price = round(rng.uniform(10, 500), 2)
+            batch.append({
+                'user': rng.randint(1, args.users),
+                'ticker': rng.choice(TICKERS),
+                'price': price if amount > 0 else -price,
+                'date': start + datetime.timedelta(minutes=rng.randint(0, 10 * 525600)),
+                'type': 'BUY' if amount > 0 else 'SELL',
+                'amount': amount,
+                'total': abs(price * amount),
+            })
+            if len(batch) == 50_000:
+                db.session.execute(insert(Dashinfo), batch)
+                batch = []
+        if batch:
+            db.session.execute(insert(Dashinfo), batch)
+        # Pretend the database predates the indexes
+        for ix in Dashinfo.__table__.indexes:
+            db.session.execute(text(f'DROP INDEX IF EXISTS {ix.name}'))
+        db.session.execute(text('DELETE FROM schema_migrations'))
+        db.session.commit()
+
+        users = [rng.randint(1, args.users) for _ in range(args.repeat)]
+        tickers = [rng.choice(TICKERS) for _ in range(args.repeat)]
+        queries = {
+            'history (user, date desc)': lambda u, t: Dashinfo.query.filter_by(user=u).order_by(
+                Dashinfo.date.desc(), Dashinfo.id.desc()).all(),
+            'held shares (user, ticker, type)': lambda u, t: db.session.query(func.sum(Dashinfo.amount)).filter_by(
+                user=u, ticker=t, type='BUY').scalar(),
+            'ticker rows (user, ticker)': lambda u, t: db.session.query(Dashinfo.id).filter_by(
+                user=u, ticker=t).all(),
+        }
+
+        def measure():
+            timings = {}
+            for name, fn in queries.items():
+                samples = []
+                for u, t in zip(users, tickers):
+                    begin = time.perf_counter()
+                    fn(u, t)
+                    samples.append((time.perf_counter() - begin) * 1000)
+                    db.session.rollback()
+                timings[name] = statistics.median(samples)
+            return timings
+
+        before = measure()
+        begin = time.perf_counter()
+        applied = run_migrations(db.engine, db.metadata)
+        migrate_s = time.perf_counter() - begin
+        after = measure()
+
+    print(f"{args.rows} transactions, {args.users} users; applied {applied} in {migrate_s:.1f}s")
+    for name in queries:
+        print(f"  {name:<34} before {before[name]:8.2f} ms   after {after[name]:7.2f} ms   "
+              f"x{before[name] / max(after[name], 1e-6):.0f}")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
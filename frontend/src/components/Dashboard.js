@@ -35,7 +35,7 @@ const Dashboard = () => {
         setLoading(true);
         const [portfolioResponse, transactionsResponse] = await Promise.all([
           axios.get('/api/portfolio/stocks'),
-          axios.get('/api/transactions')
+          axios.get('/api/transactions', { params: { limit: 5 } })
         ]);
 
         if (portfolioResponse.data.success) {
@@ -1,9 +1,28 @@
 import React from 'react';
 
-const OptimizedImage = ({ src, alt, className, ...props }) => {
+// Widths the /api/images endpoint renders (others snap up to the next one)
+const DERIVATIVE_WIDTHS = [320, 640, 960, 1280, 1920];
+
+// Build a srcSet of server-resized derivatives for images under /static/.
+// The server never upscales, so widths past the original are left out and
+// the original itself is the largest candidate.
+const derivativeSrcSet = (src, widths, originalWidth) => {
+  const match = /\/static\/(?:media\/)?([^?#]+\.(?:png|jpe?g|gif|webp))$/i.exec(src || '');
+  if (!match) return undefined;
+  const candidates = widths
+    .filter((w) => w < originalWidth)
+    .map((w) => `/api/images/${match[1]}?w=${w} ${w}w`);
+  return [...candidates, `${src} ${originalWidth}w`].join(', ');
+};
+
+// srcSet needs both sizes and the original's pixel width (originalWidth)
+const OptimizedImage = ({ src, alt, className, widths = DERIVATIVE_WIDTHS, sizes, originalWidth, ...props }) => {
+  const srcSet = sizes && originalWidth ? derivativeSrcSet(src, widths, originalWidth) : undefined;
   return (
     <img
       src={src}
+      srcSet={srcSet}
+      sizes={srcSet ? sizes : undefined}
       alt={alt}
       className={className}
       loading="lazy"
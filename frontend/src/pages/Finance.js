@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useContext } from 'react';
+import React, { useState, useEffect, useContext, useRef } from 'react';
 import { motion } from 'framer-motion';
 import { AuthContext } from '../contexts/AuthContext';
 import { Link } from 'react-router-dom';
@@ -14,6 +14,9 @@ import {
   ArrowRightIcon
 } from '@heroicons/react/24/outline';
 
+// Downsampling targets the backend snaps max_points to (MAX_POINTS_BUCKETS in app.py)
+const MAX_POINTS_BUCKETS = [500, 1000, 2000];
+
 const Finance = () => {
   const { user } = useContext(AuthContext);
   const [activeTab, setActiveTab] = useState('market');
@@ -22,6 +25,8 @@ const Finance = () => {
   const [loading, setLoading] = useState(false);
   const [portfolio, setPortfolio] = useState([]);
   const [transactions, setTransactions] = useState([]);
+  // Cursor of the last transaction sync; later loads only fetch the changes
+  const syncCursor = useRef(null);
   const [newStock, setNewStock] = useState({
     ticker: '',
     shares: '',
@@ -47,6 +52,11 @@ const Finance = () => {
   const [startDate, setStartDate] = useState('');
   const [endDate, setEndDate] = useState('');
 
+  useEffect(() => {
+    // Another account's local transaction copy must not be delta-synced
+    syncCursor.current = null;
+  }, [user]);
+
   useEffect(() => {
     if (user && (activeTab === 'portfolio' || activeTab === 'transactions')) {
       fetchPortfolio();
@@ -72,9 +82,34 @@ const Finance = () => {
 
   const fetchTransactions = async () => {
     try {
+      if (syncCursor.current) {
+        let more = true;
+        while (more) {
+          // 410 means the change log no longer reaches back to the cursor: reload in full
+          const delta = await axios.get('/api/transactions', {
+            params: { since: syncCursor.current },
+            validateStatus: (status) => status < 400 || status === 410,
+          });
+          if (!delta.data.success) {
+            syncCursor.current = null;
+            break;
+          }
+          const { added = [], deleted = [] } = delta.data;
+          setTransactions(prev => {
+            const gone = new Set([...deleted, ...added.map(t => t.id)]);
+            return [...added, ...prev.filter(t => !gone.has(t.id))].sort(
+              (a, b) => (a.date < b.date ? 1 : a.date > b.date ? -1 : b.id - a.id)
+            );
+          });
+          syncCursor.current = delta.data.sync_cursor;
+          more = delta.data.has_more;
+        }
+        if (syncCursor.current) return;
+      }
       const response = await axios.get('/api/transactions');
       if (response.data.success) {
         setTransactions(response.data.transactions || []);
+        syncCursor.current = response.data.sync_cursor || null;
       } else if (response.data.message) {
         toast.error(response.data.message);
       }
@@ -132,6 +167,9 @@ const Finance = () => {
     } else {
       payload.period = period; // string, backend accepts string or array
     }
+    // Let the backend downsample long series to roughly one point per pixel
+    payload.max_points = MAX_POINTS_BUCKETS.find((b) => b >= window.innerWidth)
+      || MAX_POINTS_BUCKETS[MAX_POINTS_BUCKETS.length - 1];
 
     try {
       setLoading(true);
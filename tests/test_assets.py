@@ -0,0 +1,65 @@
+import gzip
+import os
+
+import pytest
+from flask import Flask
+
+from backend.assets import MAX_MEMORY_FILE, AssetIndex, serve_asset
+
+BUNDLE = 'static/js/main.1234abcd.js'
+
+
+@pytest.fixture
+def build(tmp_path):
+    """Build directory with a main bundle larger than MAX_MEMORY_FILE and its npm run compress sibling."""
+    js = tmp_path / 'static' / 'js'
+    js.mkdir(parents=True)
+    body = b''.join(b'console.log("line %d");\n' % i for i in range(MAX_MEMORY_FILE // 20))
+    assert len(body) > MAX_MEMORY_FILE
+    (js / 'main.1234abcd.js').write_bytes(body)
+    (js / 'main.1234abcd.js.gz').write_bytes(gzip.compress(body))
+    return tmp_path, body
+
+
+@pytest.fixture
+def client(build):
+    root, _ = build
+    index = AssetIndex(str(root))
+    app = Flask(__name__, static_folder=None)
+
+    @app.route('/<path:rel>')
+    def asset(rel):
+        return serve_asset(index.get(rel))
+
+    return app.test_client()
+
+
+def test_large_bundle_is_served_from_prebuilt_gzip(client, build):
+    _, body = build
+    response = client.get('/' + BUNDLE, headers={'Accept-Encoding': 'gzip, br'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) < len(body)
+    assert gzip.decompress(response.get_data()) == body
+
+
+def test_large_bundle_identity_has_its_own_etag(client, build):
+    _, body = build
+    plain = client.get('/' + BUNDLE, headers={'Accept-Encoding': 'identity'})
+    encoded = client.get('/' + BUNDLE, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+    assert plain.get_data() == body
+    assert plain.headers['ETag'] != encoded.headers['ETag']
+
+    revalidated = client.get('/' + BUNDLE, headers={'Accept-Encoding': 'gzip',
+                                                    'If-None-Match': encoded.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_stale_sibling_is_ignored(build):
+    root, _ = build
+    path = os.path.join(root, BUNDLE)
+    os.utime(path + '.gz', (0, 0))
+    assert AssetIndex(str(root)).get(BUNDLE).variant_paths == {}
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from backend.calculator import batch_values, convert_batch
+
+
+def test_batch_values_accepts_numbers():
+    assert batch_values([1, 2.5, -3], 10).tolist() == [1.0, 2.5, -3.0]
+
+
+@pytest.mark.parametrize('values, message', [
+    ([], 'values must be a non-empty list'),
+    ('1,2', 'values must be a non-empty list'),
+    ([1, 2, 3], 'At most 2 values per request'),
+    ([[1]], 'values must be a flat list of numbers'),
+    ([True, 2], 'values must be numbers'),
+    ([False], 'values must be numbers'),
+    (['1'], 'values must be numbers'),
+    ([None], 'values must be numbers'),
+    ([float('inf')], 'values must be finite numbers'),
+])
+def test_batch_values_rejects(values, message):
+    with pytest.raises(ValueError, match=message):
+        batch_values(values, 2)
+
+
+def test_convert_batch_per_value_units():
+    results = convert_batch(np.array([1.0, 1.0]), ['m', 'kg'], ['cm', 'g'])
+    assert results.tolist() == pytest.approx([100.0, 1000.0])